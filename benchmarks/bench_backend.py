@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark of memory of graph backends (networkx and compact) for big topologies.
+
+Each backend is measured in new interpreter: peak RSS after creating graph
+and after generating configs (get_conf).
+
+    $ python benchmarks/bench_backend.py
+    $ python benchmarks/bench_backend.py --nodes 100000 --graph-type line_graph
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from memory import peak_rss
+from msg_topgen.generate import get_conf
+from msg_topgen.topology import Topology
+
+
+def run_child(nodes, graph_type, backend, conf):
+    """
+    Function for create topology and generate configs (executed in child process).
+    :param nodes: number of nodes
+    :param graph_type: graph type
+    :param backend: graph backend
+    :param conf: flag for generate configs
+    """
+    brokers = nodes // 10
+    routers = ['router%d' % x for x in range(nodes - brokers)]
+    brokers = ['broker%d' % x for x in range(brokers)]
+    result = {'before': peak_rss()}
+
+    start = time.time()
+    topology = Topology(backend=backend)
+    topology.create_graph(routers, brokers, graph_type)
+    result['graph_time'], result['graph'] = time.time() - start, peak_rss()
+
+    if conf:
+        start = time.time()
+        get_conf(topology.graph)
+        result['conf_time'], result['conf'] = time.time() - start, peak_rss()
+
+    sys.stdout.write(json.dumps(result))
+
+
+def measure(nodes, graph_type, backend, conf):
+    """
+    Function for run benchmark of one backend in child process.
+    :return: dict with peak RSS [MB] and times [s]
+    """
+    output = subprocess.check_output([sys.executable, __file__, '--nodes', str(nodes), '--graph-type', graph_type,
+                                      '--child', backend] + ([] if conf else ['--no-conf']))
+    return json.loads(output.decode('utf-8').strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark of graph backends.')
+    parser.add_argument('--nodes', type=int, default=100000, help='Number of nodes')
+    parser.add_argument('--graph-type', default='bus_graph', help='Graph type')
+    parser.add_argument('--no-conf', action='store_true', help='Measure only creating of graph')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        return run_child(args.nodes, args.graph_type, args.child, not args.no_conf)
+
+    sys.stdout.write("nodes: %d, graph type: %s\n" % (args.nodes, args.graph_type))
+    sys.stdout.write("%-10s %-14s %-18s %-14s %-18s\n" % ('backend', 'graph [s]', 'graph peak [MB]', 'conf [s]',
+                                                         'conf peak [MB]'))
+    for backend in sorted(Topology.BACKENDS):
+        result = measure(args.nodes, args.graph_type, backend, not args.no_conf)
+        sys.stdout.write("%-10s %-14.3f %-18.1f %-14s %-18s\n" % (
+            backend, result['graph_time'], result['graph'] - result['before'],
+            '%.3f' % result['conf_time'] if 'conf_time' in result else '-',
+            '%.1f' % (result['conf'] - result['before']) if 'conf' in result else '-'))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
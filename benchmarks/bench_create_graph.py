@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark of graph construction (Topology.create_graph) for big topologies.
+
+Builders generate edge lists in bulk with cost attached in the same pass;
+the compact backend takes them as numpy index arrays and complete graph of
+networkx backend fills adjacency dicts directly. Legacy builders are the
+builders before this change: complete graph by add_edges_from(combinations),
+line and bus graphs edge by edge with cost set by nx.set_edge_attributes.
+
+    $ python benchmarks/bench_create_graph.py
+    $ python benchmarks/bench_create_graph.py --routers 500 2000 --graph-type bus_graph --legacy
+"""
+
+import argparse
+import itertools
+import os
+import sys
+import time
+
+import networkx as nx
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from msg_topgen.topology import Topology
+
+
+def legacy_create_graph(routers, brokers, graph_type):
+    """
+    Function for create graph by builders before bulk edge lists (complete, bus and line graph).
+    :param routers: List of routers ID
+    :param brokers: List of brokers ID
+    :param graph_type: graph type
+    :return: networkx graph
+    """
+    graph = nx.Graph()
+    graph.add_nodes_from(routers, type='router')
+    graph.add_nodes_from(brokers, type='broker')
+
+    if graph_type == 'complete_graph':
+        graph.add_edges_from(itertools.combinations(graph.nodes(), 2), value=Topology.DEFAULT_COST)
+        return graph
+
+    for x in range(len(routers) - 1):
+        graph.add_edge(routers[x], routers[x + 1])
+    if graph_type == 'bus_graph':
+        for x in range(len(brokers)):
+            graph.add_edge(brokers[x], routers[x % len(routers)])
+    else:
+        for x in range(len(brokers) // 2 - 1):
+            graph.add_edge(brokers[x], brokers[x + 1])
+        for x in range(len(brokers) - 1, len(brokers) // 2, -1):
+            graph.add_edge(brokers[x], brokers[x - 1])
+        if brokers:
+            graph.add_edge(brokers[0], routers[0])
+            graph.add_edge(brokers[-1], routers[-1])
+    nx.set_edge_attributes(graph, 'value', Topology.DEFAULT_COST)
+
+    return graph
+
+
+def measure(function, *args):
+    """
+    Function for measure wall time of one call.
+    :return: seconds
+    """
+    start = time.time()
+    function(*args)
+    return time.time() - start
+
+
+def create(backend):
+    """
+    Function for create graph builder of given backend.
+    :param backend: graph backend
+    :return: function(routers, brokers, graph_type)
+    """
+    def create_graph(routers, brokers, graph_type):
+        topology = Topology(backend=backend)
+        topology.create_graph(routers, brokers, graph_type)
+        # compact graph builds adjacency on first read
+        topology.graph.number_of_edges()
+    return create_graph
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark of graph construction.')
+    parser.add_argument('--routers', type=int, nargs='+', default=[500, 1000, 2000], help='Amounts of routers')
+    parser.add_argument('--brokers', type=int, default=10, help='Amount of brokers')
+    parser.add_argument('--graph-type', default='complete_graph', help='Graph type')
+    parser.add_argument('--legacy', action='store_true', help='Measure also legacy edge-by-edge builders')
+    args = parser.parse_args()
+
+    sys.stdout.write("%-10s %-10s %-12s %-14s %-12s\n" % ('routers', 'edges', 'legacy [s]', 'networkx [s]',
+                                                         'compact [s]'))
+    for routers in args.routers:
+        names = (['router%d' % x for x in range(routers)], ['broker%d' % x for x in range(args.brokers)])
+        legacy = '-'
+        if args.legacy:
+            legacy = '%.3f' % measure(legacy_create_graph, names[0], names[1], args.graph_type)
+        # builders pop nodes from lists (line_mix_graph), each run gets own copy
+        networkx = measure(create('networkx'), list(names[0]), list(names[1]), args.graph_type)
+        compact = measure(create('compact'), list(names[0]), list(names[1]), args.graph_type)
+        topology = Topology(backend='compact')
+        topology.create_graph(list(names[0]), list(names[1]), args.graph_type)
+        sys.stdout.write("%-10d %-10d %-12s %-14.3f %-12.3f\n" % (routers, topology.graph.number_of_edges(), legacy,
+                                                                 networkx, compact))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
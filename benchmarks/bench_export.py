@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark of topology picture export for big topologies.
+
+    $ python benchmarks/bench_export.py --nodes 500 5000
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from msg_topgen.topology import Topology
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark of Topology.export_graph.')
+    parser.add_argument('--nodes', type=int, nargs='+', default=[100, 1000, 5000], help='Amounts of nodes')
+    parser.add_argument('--graph-type', default='bus_graph', help='Graph type')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    try:
+        sys.stdout.write("%-10s %-12s %-12s\n" % ('nodes', 'layout [s]', 'export [s]'))
+        for nodes in args.nodes:
+            brokers = nodes // 10
+            topology = Topology()
+            topology.create_graph(['router%d' % x for x in range(nodes - brokers)],
+                                  ['broker%d' % x for x in range(brokers)], args.graph_type)
+
+            start = time.time()
+            topology.get_layout(args.graph_type)
+            layout = time.time() - start
+
+            start = time.time()
+            topology.export_graph(os.path.join(directory, 'topology.svg'), 'benchmark', args.graph_type)
+            export = time.time() - start
+
+            sys.stdout.write("%-10d %-12.3f %-12.3f\n" % (nodes, layout, export))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
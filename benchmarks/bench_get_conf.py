@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark of config generation (get_conf) for big topologies.
+
+Config generation has to be linear in nodes plus edges, so time per router
+has to stay (roughly) constant with growing amount of routers.
+
+    $ python benchmarks/bench_get_conf.py
+    $ python benchmarks/bench_get_conf.py --routers 1000 5000 --legacy
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from msg_topgen import generate
+from msg_topgen.ports import PortAllocator
+from msg_topgen.topology import Topology
+
+
+def build_topology(routers, brokers, graph_type):
+    """
+    Function for create topology with given amount of routers and brokers.
+    :param routers: number of routers
+    :param brokers: number of brokers
+    :param graph_type: graph type
+    :return: networkx graph
+    """
+    topology = Topology()
+    topology.create_graph(['router%d' % x for x in range(routers)],
+                          ['broker%d' % x for x in range(brokers)], graph_type)
+    return topology.graph
+
+
+def legacy_get_conf(graph):
+    """
+    Function for generate configs without shared attribute index (every generator scans whole graph).
+    :param graph: networkx graph of topology
+    """
+    node_type = generate.index_node_attributes(graph, ('type',))['type']
+    ports = PortAllocator(generate.DEFAULT_PORT)
+
+    for node, nbrdict in graph.adjacency():
+        if node_type[node] == 'broker':
+            continue
+        generate.generate_router_info(graph, node, nbrdict, node_type)
+        generate.generate_listeners(graph, node, nbrdict, node_type, ports=ports)
+        generate.generate_addresses(graph, node, nbrdict, node_type)
+        generate.generate_connection_settings(graph, node)
+
+    for node, nbrdict in graph.adjacency():
+        if node_type[node] == 'broker':
+            continue
+        generate.generate_connectors(graph, node, nbrdict, node_type, ports=ports)
+
+
+def measure(function, graph):
+    """
+    Function for measure wall time of one call.
+    :param function: measured function
+    :param graph: argument of function
+    :return: seconds
+    """
+    start = time.time()
+    function(graph)
+    return time.time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark of get_conf.')
+    parser.add_argument('--routers', type=int, nargs='+', default=[1000, 5000, 20000],
+                        help='Amounts of routers')
+    parser.add_argument('--graph-type', default='bus_graph', help='Graph type')
+    parser.add_argument('--legacy', action='store_true',
+                        help='Measure also generation without attribute index (quadratic, slow!)')
+    args = parser.parse_args()
+
+    sys.stdout.write("%-10s %-10s %-12s %-14s %-12s\n" % ('routers', 'edges', 'get_conf [s]', 'per router [us]',
+                                                         'legacy [s]'))
+    for routers in args.routers:
+        graph = build_topology(routers, routers // 10, args.graph_type)
+        elapsed = measure(generate.get_conf, graph)
+        legacy = '-'
+        if args.legacy:
+            graph = build_topology(routers, routers // 10, args.graph_type)
+            legacy = '%.3f' % measure(legacy_get_conf, graph)
+        sys.stdout.write("%-10d %-10d %-12.3f %-14.1f %-12s\n" % (routers, graph.number_of_edges(), elapsed,
+                                                                 elapsed / routers * 1e6, legacy))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark of cold-start import time of msg_topgen.
+
+Each measurement runs in new interpreter, so modules cached by previous
+import don't affect the result. Non-zero exit code is returned when median
+import time exceeds budget (1.5 s by default; import takes ~0.6 s on reference
+machine, importing matplotlib.pyplot eagerly adds ~0.3 s).
+
+    $ python benchmarks/bench_import.py
+    $ python benchmarks/bench_import.py --budget 1.0
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+# Maximal allowed median import time [s]
+BUDGET = 1.5
+
+CODE = """
+import sys, time
+start = time.time()
+import %s
+sys.stdout.write('%%f %%d' %% (time.time() - start, 'matplotlib' in sys.modules))
+"""
+
+
+def measure(module):
+    """
+    Function for measure import time of module in new interpreter.
+    :param module: name of imported module
+    :return: seconds, flag if matplotlib was imported
+    """
+    output = subprocess.check_output([sys.executable, '-c', CODE % module], cwd=ROOT)
+    elapsed, matplotlib = output.split()
+    return float(elapsed), bool(int(matplotlib))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark of msg_topgen import time.')
+    parser.add_argument('--module', default='msg_topgen.msg_topgen', help='Imported module')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of measurements')
+    parser.add_argument('--budget', type=float, default=BUDGET,
+                        help='Maximal allowed median time [s], 0 disables the check (default: %(default)s)')
+    args = parser.parse_args()
+
+    results = [measure(args.module) for _ in range(args.repeat)]
+    times = sorted(elapsed for elapsed, _ in results)
+    median = times[len(times) // 2]
+
+    sys.stdout.write("import %s: median %.3f s, min %.3f s, max %.3f s, matplotlib imported: %s\n"
+                     % (args.module, median, times[0], times[-1], results[0][1]))
+
+    if args.budget and median > args.budget:
+        sys.stdout.write("Import time exceeds budget %.3f s!\n" % args.budget)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
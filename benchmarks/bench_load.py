@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark of loading big graph files (node-link format) in JSON and YAML.
+
+    $ python benchmarks/bench_load.py --nodes 10000
+    $ python benchmarks/bench_load.py --nodes 50000 --memory
+
+With --memory, peak RSS of loading YAML file as whole document and by
+streaming loader is measured (each in new interpreter).
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import yaml
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from memory import peak_rss
+from msg_topgen.topology import Topology
+
+
+def create_graph_data(nodes):
+    """
+    Function for create node-link data of bus topology with routers and brokers.
+    :param nodes: number of nodes
+    :return: node-link data
+    """
+    brokers = nodes // 10
+    routers = nodes - brokers
+    data = {'directed': False, 'multigraph': False, 'graph': {}, 'nodes': [], 'links': []}
+
+    for x in range(routers):
+        data['nodes'].append({'id': 'router%d' % x, 'type': 'router',
+                              'listener': [{'host': '0.0.0.0', 'port': 5672, 'role': 'normal'}]})
+        if x:
+            data['links'].append({'source': 'router%d' % (x - 1), 'target': 'router%d' % x, 'value': 1})
+    for x in range(brokers):
+        data['nodes'].append({'id': 'broker%d' % x, 'type': 'broker'})
+        data['links'].append({'source': 'broker%d' % x, 'target': 'router%d' % (x % routers), 'value': 1})
+
+    return data
+
+
+def measure(function, *args):
+    """
+    Function for measure wall time of one call.
+    :return: seconds
+    """
+    start = time.time()
+    function(*args)
+    return time.time() - start
+
+
+def pure_python_load(filename):
+    """
+    Function for load file same way as before (pure-Python YAML loader for all files).
+    :param filename: path to file
+    """
+    with open(filename, 'r') as stream:
+        yaml.load(stream, Loader=yaml.SafeLoader)
+
+
+def measure_memory(filename, streaming):
+    """
+    Function for load graph file in child process and measure its peak RSS.
+    :param filename: path to graph file
+    :param streaming: flag for streaming loader
+    :return: dict with peak RSS before and after load [MB] and load time
+    """
+    output = subprocess.check_output([sys.executable, __file__, '--child', filename] +
+                                     (['--streaming'] if streaming else []))
+    return json.loads(output.decode('utf-8').strip().splitlines()[-1])
+
+
+def run_child(filename, streaming):
+    """
+    Function for load graph file (executed in child process).
+    :param filename: path to graph file
+    :param streaming: flag for streaming loader
+    """
+    before = peak_rss()
+    topology = Topology()
+    elapsed = measure(topology.load_graph_from_json, filename, streaming)
+    peak = peak_rss()
+    sys.stdout.write(json.dumps({'before': before, 'peak': peak, 'time': elapsed}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark of graph file loading.')
+    parser.add_argument('--nodes', type=int, default=10000, help='Number of nodes')
+    parser.add_argument('--memory', action='store_true', help='Measure peak memory of loading')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--streaming', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        return run_child(args.child, args.streaming)
+
+    data = create_graph_data(args.nodes)
+    directory = tempfile.mkdtemp()
+    try:
+        files = {
+            'json': os.path.join(directory, 'graph.json'),
+            'yaml': os.path.join(directory, 'graph.yml'),
+        }
+        with open(files['json'], 'w') as f:
+            json.dump(data, f, indent=2)
+        with open(files['yaml'], 'w') as f:
+            yaml.dump(data, f, Dumper=getattr(yaml, 'CSafeDumper', yaml.SafeDumper), default_flow_style=False)
+
+        sys.stdout.write("nodes: %d, libyaml available: %s\n" % (args.nodes, hasattr(yaml, 'CSafeLoader')))
+        if args.memory:
+            sys.stdout.write("%-10s %-10s %-16s %-16s\n" % ('loader', 'time [s]', 'RSS before [MB]', 'peak RSS [MB]'))
+            for streaming in (False, True):
+                result = measure_memory(files['yaml'], streaming)
+                sys.stdout.write("%-10s %-10.3f %-16.1f %-16.1f\n" % ('streaming' if streaming else 'document',
+                                                                     result['time'], result['before'],
+                                                                     result['peak']))
+            return 0
+
+        sys.stdout.write("%-6s %-10s %-22s %-26s %-16s\n" % ('file', 'size [MB]', 'pure-Python YAML [s]',
+                                                              'load_graph_from_json [s]', 'warm cache [s]'))
+        for name in ('json', 'yaml'):
+            cold = measure(Topology().load_graph_from_json, files[name])
+            cached = Topology(cache_dir=os.path.join(directory, 'cache'))
+            cached.load_graph_from_json(files[name])
+            sys.stdout.write("%-6s %-10.1f %-22.3f %-26.3f %-16.3f\n" % (
+                name, os.path.getsize(files[name]) / 1024.0 / 1024.0, measure(pure_python_load, files[name]),
+                cold, measure(cached.load_graph_from_json, files[name])))
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
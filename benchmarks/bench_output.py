@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark of peak memory used by writing of router_confs.json.
+
+Every mode is measured in new interpreter, peak RSS is compared with RSS
+before configs are generated and written:
+
+    dumps   get_conf and whole document serialized by json.dumps
+    stream  get_conf and configs written one by one
+    iter    configs written one by one as they are generated by iter_conf
+
+    $ python benchmarks/bench_output.py --routers 10000
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, ROOT)
+
+from memory import peak_rss
+
+MODES = ('dumps', 'stream', 'iter')
+
+
+def run(mode, routers, filename):
+    """
+    Function for generate configs and write them in given mode (executed in child process).
+    :param mode: 'dumps', 'stream' or 'iter'
+    :param routers: number of routers
+    :param filename: path to output file
+    :return: dict with measured values
+    """
+    from msg_topgen.generate import get_conf, iter_conf
+    from msg_topgen.msg_topgen import write_confs
+    from msg_topgen.topology import Topology
+
+    topology = Topology()
+    topology.create_graph(['router%d' % x for x in range(routers)], ['broker%d' % x for x in range(routers // 10)],
+                          'bus_graph')
+    before = peak_rss()
+
+    start = time.time()
+    with open(filename, 'w') as f:
+        if mode == 'dumps':
+            f.write(json.dumps({'confs': list(get_conf(topology.graph).values())}))
+        elif mode == 'stream':
+            write_confs(f, get_conf(topology.graph).values())
+        else:
+            write_confs(f, (conf for _, conf in iter_conf(topology.graph)))
+
+    return {'mode': mode, 'time': time.time() - start, 'before': before, 'peak': peak_rss()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark of router_confs.json writing.')
+    parser.add_argument('--routers', type=int, default=10000, help='Amount of routers')
+    parser.add_argument('--child', choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument('--output', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        sys.stdout.write(json.dumps(run(args.child, args.routers, args.output)))
+        return 0
+
+    handle, filename = tempfile.mkstemp(suffix='.json')
+    os.close(handle)
+    try:
+        sys.stdout.write("%-8s %-10s %-10s %-16s %-16s\n" % ('mode', 'routers', 'time [s]', 'RSS before [MB]',
+                                                           'peak RSS [MB]'))
+        for mode in MODES:
+            output = subprocess.check_output([sys.executable, __file__, '--child', mode, '--routers',
+                                              str(args.routers), '--output', filename], cwd=ROOT)
+            result = json.loads(output.decode('utf-8').strip().splitlines()[-1])
+            sys.stdout.write("%-8s %-10d %-10.3f %-16.1f %-16.1f\n" % (mode, args.routers, result['time'],
+                                                                     result['before'], result['peak']))
+    finally:
+        os.remove(filename)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Benchmark of memory of generated configs with shared default components (templates)
+and with fresh copy of each default listener/address per router (legacy).
+
+Each variant is measured in new interpreter: growth of peak RSS by generating
+configs of all routers (get_conf, configs are held in memory).
+
+    $ python benchmarks/bench_templates.py
+    $ python benchmarks/bench_templates.py --routers 50000 --graph-type line_graph
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from memory import peak_rss
+from msg_topgen import generate, templates
+from msg_topgen.topology import Topology
+
+
+class FreshCopies(object):
+    """
+    Class representing default components copied for each router (as before templates).
+    """
+
+    def __init__(self, items):
+        self.items = items
+
+    def __iter__(self):
+        return (dict(item) for item in self.items)
+
+
+def run_child(routers, graph_type, legacy):
+    """
+    Function for create topology and generate configs (executed in child process).
+    :param routers: number of routers
+    :param graph_type: graph type
+    :param legacy: flag for copy default components for each router
+    """
+    if legacy:
+        generate.DEFAULT_ADDRESSES = FreshCopies(generate.DEFAULT_ADDRESSES)
+        generate.listener_template = lambda role, port: dict(templates.listener_template(role, port))
+
+    topology = Topology()
+    topology.create_graph(['router%d' % x for x in range(routers)], ['broker%d' % x for x in range(routers // 10)],
+                          graph_type)
+    result = {'graph': peak_rss()}
+
+    start = time.time()
+    confs = generate.get_conf(topology.graph)
+    result['conf_time'], result['conf'] = time.time() - start, peak_rss()
+    result['routers'] = len(confs)
+
+    sys.stdout.write(json.dumps(result))
+
+
+def measure(routers, graph_type, legacy):
+    """
+    Function for run benchmark of one variant in child process.
+    :return: dict with peak RSS [MB] and time [s]
+    """
+    output = subprocess.check_output([sys.executable, __file__, '--routers', str(routers), '--graph-type', graph_type,
+                                      '--child'] + (['--legacy'] if legacy else []))
+    return json.loads(output.decode('utf-8').strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark of shared default components.')
+    parser.add_argument('--routers', type=int, default=20000, help='Number of routers')
+    parser.add_argument('--graph-type', default='bus_graph', help='Graph type')
+    parser.add_argument('--legacy', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        return run_child(args.routers, args.graph_type, args.legacy)
+
+    sys.stdout.write("routers: %d, graph type: %s\n" % (args.routers, args.graph_type))
+    sys.stdout.write("%-10s %-12s %-16s\n" % ('variant', 'conf [s]', 'conf memory [MB]'))
+    for name, legacy in [('legacy', True), ('templates', False)]:
+        result = measure(args.routers, args.graph_type, legacy)
+        sys.stdout.write("%-10s %-12.3f %-16.1f\n" % (name, result['conf_time'], result['conf'] - result['graph']))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
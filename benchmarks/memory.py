@@ -0,0 +1,23 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+Memory measurement shared by benchmarks (imported by scripts in this dir).
+"""
+
+import resource
+
+
+def peak_rss():
+    """
+    Function for get peak RSS of this process in MB.
+    VmHWM is used on Linux, ru_maxrss includes memory of parent process at the time of fork.
+    :return: peak RSS
+    """
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024.0
+    except IOError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
@@ -3,11 +3,15 @@
 
 
 import argparse
+import os
 import shlex
 import sys
 
 import yaml
 
+# Default dir with cache of parsed graph files
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'msg_topgen')
+
 
 # @TODO - create package from this function
 def parse_inventory(filename):
@@ -125,6 +129,7 @@ class Config:
             number of machines
             number of routers/brokers
             list of names for routers/brokers
+            output options
     """
 
     def __init__(self):
@@ -136,7 +141,20 @@ class Config:
         self.brokers = 1
         self.router_names = []
         self.broker_names = []
+        self.host_map = {}
         self.out_dir = ""
+        self.no_image = False
+        self.shard = False
+        self.output_format = 'json'
+        self.incremental = False
+        self.cache_dir = None
+        self.streaming = False
+        self.backend = 'networkx'
+        self.routing_table = False
+        self.report = False
+        self.port_table = False
+        self.profile = False
+        self.cprofile = False
 
     def args_parse(self):
         """
@@ -150,12 +168,64 @@ class Config:
         parser = argparse.ArgumentParser(description='Qpid-dispatch facts generator.')
         parser.add_argument('-o', '--output-dir', action="store", dest="out_dir", help='Path to output dir',
                             required=False)
+        parser.add_argument('--no-image', action="store_true", dest="no_image",
+                            help='Do not export topology picture (skips import of drawing libraries)')
+        parser.add_argument('--shard', action="store_true", dest="shard",
+                            help='Write config of each router into own file routers/<router_id>.json')
+        parser.add_argument('-f', '--format', action="store", dest="output_format", choices=['json', 'conf'],
+                            default='json',
+                            help='Format of router configs: json variables for ansible or ready-to-use qdrouterd.conf '
+                                 'files (conf is always written per router)')
+        parser.add_argument('--incremental', action="store_true", dest="incremental",
+                            help='Regenerate only configs of routers affected by change of graph since previous run')
+        parser.add_argument('--no-cache', action="store_true", dest="no_cache",
+                            help='Do not use cache of parsed graph files (%s)' % DEFAULT_CACHE_DIR)
+        parser.add_argument('--stream-load', action="store_true", dest="streaming",
+                            help='Build graph directly while graph file is parsed (lower memory for huge files, '
+                                 'cache is not used)')
+        parser.add_argument('--compact', action="store_const", dest="backend", const='compact', default='networkx',
+                            help='Keep graph in compact arrays instead of networkx (lower memory for huge topologies)')
+        parser.add_argument('--routing-table', action="store_true", dest="routing_table",
+                            help='Export cost/hop table of all pairs of routers into routing_table.json')
+        parser.add_argument('--report', action="store_true", dest="report",
+                            help='Export report of topology (degree, connections of routers, diameter, ...) '
+                                 'into report.json')
+        parser.add_argument('--port-table', action="store_true", dest="port_table",
+                            help='Export listener ports of all routers (router -> role -> port) into port_table.json')
+        parser.add_argument('--profile', action="store_true", dest="profile",
+                            help='Export wall time, CPU time and peak memory of stages and generator functions '
+                                 'into profile.json')
+        parser.add_argument('--cprofile', action="store_true", dest="cprofile",
+                            help='Dump cProfile stats of whole run into profile.prof (implies --profile)')
         required = parser.add_argument_group('required arguments')
         required.add_argument('-c', '--config-file', action="store", dest="config_file", help='Path to config file',
                               required=True)
         results = parser.parse_args()
 
-        with open(results.config_file, 'r') as stream:
+        self.out_dir = results.out_dir if results.out_dir else "/tmp/generated/"
+        self.no_image = results.no_image
+        self.shard = results.shard
+        self.output_format = results.output_format
+        self.incremental = results.incremental
+        self.cache_dir = None if results.no_cache else DEFAULT_CACHE_DIR
+        self.streaming = results.streaming
+        self.backend = results.backend
+        self.routing_table = results.routing_table
+        self.report = results.report
+        self.port_table = results.port_table
+        self.profile = results.profile or results.cprofile
+        self.cprofile = results.cprofile
+        self.load_config_file(results.config_file)
+
+        return self
+
+    def load_config_file(self, filename):
+        """
+        Method for parse config file of this package and inventory with hosts defined in it.
+        :param filename: path to config file
+        :return: self
+        """
+        with open(filename, 'r') as stream:
             try:
                 config = yaml.load(stream)
                 if 'hostfile' in config:
@@ -168,19 +238,46 @@ class Config:
                     self.graph_type = config['graph_type']
                 else:
                     self.graph_type = input("Enter graph type for generator: ")
+                if 'hosts' in config:
+                    self.host_map = config['hosts'] or {}
             except yaml.YAMLError as exc:
                 print(exc)
 
         self.get_hosts(self.path_inventory)
+        self.count_machines()
+
+        return self
+
+    def generate_hosts(self, graph_type, routers, brokers):
+        """
+        Method for set graph type and generate names of hosts (router1, router2, ..., broker1, ...) without inventory.
+        :param graph_type: graph type
+        :param routers: number of routers
+        :param brokers: number of brokers
+        :return: self
+        """
+        self.graph_type = graph_type
+        self.router_names = ['router%d' % x for x in range(1, routers + 1)]
+        self.broker_names = ['broker%d' % x for x in range(1, brokers + 1)]
+        self.count_machines()
+
+        return self
+
+    def count_machines(self):
+        """
+        Method for count routers/brokers according to their names.
+        :return: self
+        """
         self.routers = len(self.router_names)
         self.brokers = len(self.broker_names)
         self.machines = self.routers + self.brokers
-        self.out_dir = results.out_dir if results.out_dir else "/tmp/generated/"
 
         if self.routers <= 0:
             raise Exception(
                 "You're trying to create topology without router and this is useless.\nPlease check documentation on https://github.com/rh-messaging-qe/iqa-topology-generator .")
 
+        return self
+
     def get_hosts(self, filename):
         """
         Method for parsing inventory with hosts.
@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import argparse
+import collections
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import yaml
+
+from arg_parser import Config, DEFAULT_CACHE_DIR
+from generate import get_conf
+from msg_topgen import create_topology, generate_output
+
+
+def load_manifest(filename):
+    """
+    Function for load batch manifest and expand it into list of items.
+    Manifest contains list of config files and/or matrix of graph types, amounts of routers and brokers:
+
+            configs:
+              - config.yml
+            matrix:
+              graph_type: [line_graph, bus_graph]
+              routers: [2, 10, 100]
+              brokers: [1, 2]
+
+    :param filename: path to manifest file
+    :return: list of items
+    """
+    with open(filename, 'r') as stream:
+        manifest = yaml.load(stream)
+
+    return expand_manifest(manifest or {})
+
+
+def expand_manifest(manifest):
+    """
+    Function for expand manifest into items, one item per generated topology.
+    :param manifest: dict with 'configs' and/or 'matrix'
+    :return: list of items ({'config_file': ...} or {'graph_type': ..., 'routers': ..., 'brokers': ...})
+    """
+    items = [{'config_file': filename} for filename in manifest.get('configs', [])]
+
+    matrix = manifest.get('matrix')
+    if matrix:
+        for graph_type, routers, brokers in itertools.product(as_list(matrix.get('graph_type')),
+                                                              as_list(matrix.get('routers')),
+                                                              as_list(matrix.get('brokers', 0))):
+            item = {'graph_type': graph_type, 'routers': routers, 'brokers': brokers}
+            # same combination would be written into the same output dir
+            if item not in items:
+                items.append(item)
+
+    return items
+
+
+def as_list(value):
+    """
+    Function for unify single value and list of values from manifest.
+    :param value: value or list of values
+    :return: list of values
+    """
+    return value if isinstance(value, list) else [value]
+
+
+def describe(item):
+    """
+    Function for create human readable name of item.
+    :param item: batch item
+    :return: name of item
+    """
+    if 'config_file' in item:
+        return item['config_file']
+    return "%s_R%s_B%s" % (item['graph_type'], item['routers'], item['brokers'])
+
+
+def output_dirs(items, out_dir):
+    """
+    Function for assign output dir to each item, so workers never write into the same files.
+    Output of config file is named by its inventory (every graph file gives user_defined_R<n>_B<m>),
+    so each config file gets own subdir named by the file (plus index of item when file names are the same).
+    :param items: list of batch items
+    :param out_dir: path to output dir
+    :return: list of output dirs in order of items
+    """
+    names = [os.path.splitext(os.path.basename(item['config_file']))[0] if 'config_file' in item else None
+             for item in items]
+    counts = collections.Counter(names)
+
+    return [out_dir if name is None else os.path.join(out_dir, name if counts[name] == 1 else "%s_%d" % (name, idx))
+            for idx, name in enumerate(names)]
+
+
+def run_item(task):
+    """
+    Function for generate one topology (executed in worker process).
+    Failure of item is reported in result, it doesn't stop the batch.
+    :param task: tuple (item, dict of config options: out_dir, no_image, cache_dir)
+    :return: dict with item, status, error message and wall time of stages
+    """
+    item, options = task
+    result = {'item': item, 'name': describe(item), 'status': 'ok', 'error': None, 'times': {}}
+    start = time.time()
+    stage = start
+
+    try:
+        config = Config()
+        for name, value in options.items():
+            setattr(config, name, value)
+        if 'config_file' in item:
+            config.load_config_file(item['config_file'])
+        else:
+            config.generate_hosts(item['graph_type'], item['routers'], item['brokers'])
+        result['times']['config'], stage = time.time() - stage, time.time()
+
+        topology = create_topology(config)
+        result['times']['graph'], stage = time.time() - stage, time.time()
+
+        generated = get_conf(topology.graph)
+        result['times']['conf'], stage = time.time() - stage, time.time()
+
+        generate_output(config, generated, topology)
+        result['times']['output'] = time.time() - stage
+    except SystemExit as exc:
+        # Topology exits on invalid input
+        result['status'] = 'failed'
+        result['error'] = "Exited with code {}".format(exc.code)
+    except Exception as exc:
+        result['status'] = 'failed'
+        result['error'] = "{}: {}".format(type(exc).__name__, exc)
+
+    result['times']['total'] = time.time() - start
+
+    return result
+
+
+def run_batch(items, out_dir, workers=None, no_image=False, cache_dir=None):
+    """
+    Function for generate all items of batch in pool of processes.
+    :param items: list of batch items
+    :param out_dir: path to output dir
+    :param workers: number of worker processes (default number of CPUs, 1 = without pool)
+    :param no_image: flag for skip topology picture
+    :param cache_dir: path to dir with cache of parsed graph files (None = without cache)
+    :return: generator of results in order of items
+    """
+    options = {'no_image': no_image, 'cache_dir': cache_dir}
+    tasks = [(item, dict(options, out_dir=directory)) for item, directory in zip(items, output_dirs(items, out_dir))]
+    workers = workers or multiprocessing.cpu_count()
+
+    if workers == 1:
+        for task in tasks:
+            yield run_item(task)
+        return
+
+    pool = multiprocessing.Pool(min(workers, len(tasks)) or 1)
+    try:
+        for result in pool.imap(run_item, tasks):
+            yield result
+    finally:
+        pool.close()
+        pool.join()
+
+
+def main():
+    """
+    Main of batch mode
+    """
+    parser = argparse.ArgumentParser(description='Qpid-dispatch facts generator - batch of topologies.')
+    parser.add_argument('-o', '--output-dir', action="store", dest="out_dir", help='Path to output dir',
+                        default="/tmp/generated/")
+    parser.add_argument('-j', '--jobs', action="store", dest="jobs", type=int, default=None,
+                        help='Number of worker processes (default: number of CPUs)')
+    parser.add_argument('--no-image', action="store_true", dest="no_image",
+                        help='Do not export topology pictures')
+    parser.add_argument('--no-cache', action="store_true", dest="no_cache",
+                        help='Do not use cache of parsed graph files (%s)' % DEFAULT_CACHE_DIR)
+    required = parser.add_argument_group('required arguments')
+    required.add_argument('-m', '--manifest', action="store", dest="manifest", help='Path to batch manifest',
+                          required=True)
+    args = parser.parse_args()
+
+    items = load_manifest(args.manifest)
+    cache_dir = None if args.no_cache else DEFAULT_CACHE_DIR
+    start = time.time()
+    results = []
+
+    for result in run_batch(items, args.out_dir, args.jobs, args.no_image, cache_dir):
+        results.append(result)
+        sys.stdout.write("{:<8} {:>8.3f}s  {}{}\n".format(result['status'].upper(), result['times']['total'],
+                                                          result['name'],
+                                                          ": " + result['error'] if result['error'] else ""))
+
+    failed = len([result for result in results if result['status'] != 'ok'])
+    report = {'items': results, 'failed': failed, 'total': len(results), 'time': time.time() - start}
+
+    if not os.path.isdir(args.out_dir):
+        os.makedirs(args.out_dir)
+    with open(os.path.join(args.out_dir, "batch_report.json"), 'w') as f:
+        f.write(json.dumps(report))
+
+    sys.stdout.write("Generated {} of {} topologies in {:.3f}s\n".format(len(results) - failed, len(results),
+                                                                        report['time']))
+
+    return 1 if failed else 0
@@ -0,0 +1,318 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+from array import array
+
+import networkx as nx
+import numpy as np
+
+# Weight of edge without 'value' attribute
+NO_WEIGHT = float('nan')
+
+
+class NodeRecord(object):
+    """
+    Class representing node of compact graph.
+    Attributes other than type are stored only for nodes which have them.
+    """
+    __slots__ = ('name', 'type', 'attributes')
+
+    def __init__(self, name, node_type=None):
+        self.name = name
+        self.type = node_type
+        self.attributes = None
+
+    def data(self):
+        """
+        Method for get all attributes of node as dict (new object, changes aren't stored).
+        :return: dict of node attributes
+        """
+        data = dict(self.attributes) if self.attributes else {}
+        if self.type is not None:
+            data['type'] = self.type
+        return data
+
+    def update(self, attr):
+        """
+        Method for update attributes of node.
+        :param attr: dict of attributes
+        """
+        for name, value in attr.items():
+            if name == 'type':
+                self.type = value
+            else:
+                if self.attributes is None:
+                    self.attributes = {}
+                self.attributes[name] = value
+
+
+class CompactGraph(object):
+    """
+    Class representing undirected graph with compact memory representation.
+    Nodes are numbered by integers and kept in __slots__ records, adjacency is kept in arrays
+    in compressed sparse row (CSR) format and edge supports only numeric 'value' attribute (edge cost).
+    Class implements subset of networkx graph API used by Topology and generators, to_networkx() creates
+    networkx graph for drawing/export.
+    """
+
+    def __init__(self):
+        self.graph = {}
+        self.records = []
+        self.index = {}
+        # edges in order of adding
+        self.sources = array('i')
+        self.targets = array('i')
+        self.weights = array('d')
+        # CSR adjacency, built on first read after change
+        self.offsets = None
+        self.neighbors = None
+        self.edge_ids = None
+
+    def __len__(self):
+        return len(self.records)
+
+    def __iter__(self):
+        return (record.name for record in self.records)
+
+    def __contains__(self, node):
+        return node in self.index
+
+    def __getitem__(self, node):
+        return NeighborView(self, self.index[node])
+
+    @property
+    def node(self):
+        return NodeView(self, data=True)
+
+    def nodes(self, data=False):
+        return NodeView(self, data)
+
+    def is_directed(self):
+        return False
+
+    def is_multigraph(self):
+        return False
+
+    def number_of_nodes(self):
+        return len(self.records)
+
+    def number_of_edges(self):
+        self.freeze()
+        return len(self.neighbors) // 2
+
+    def add_node(self, node, **attr):
+        """
+        Method for add node or update attributes of existing node.
+        :param node: node name
+        :param attr: node attributes
+        """
+        idx = self.index.get(node)
+        if idx is None:
+            idx = self.index[node] = len(self.records)
+            self.records.append(NodeRecord(node))
+            self.offsets = None
+        if attr:
+            self.records[idx].update(attr)
+
+    def add_nodes_from(self, nodes, **attr):
+        for node in nodes:
+            self.add_node(node, **attr)
+
+    def add_edge(self, u, v, **attr):
+        """
+        Method for add edge, missing nodes are created.
+        :param u: node name
+        :param v: node name
+        :param attr: edge attributes (only 'value' is stored)
+        """
+        for node in (u, v):
+            if node not in self.index:
+                self.add_node(node)
+        self.sources.append(self.index[u])
+        self.targets.append(self.index[v])
+        self.weights.append(attr.get('value', NO_WEIGHT))
+        self.offsets = None
+
+    def add_edges_from(self, edges, **attr):
+        for edge in edges:
+            data = dict(attr)
+            if len(edge) == 3:
+                data.update(edge[2])
+            self.add_edge(edge[0], edge[1], **data)
+
+    def add_edges_from_arrays(self, sources, targets, value=None):
+        """
+        Method for add edges given by arrays of node IDs (integer ids, not names) in bulk.
+        :param sources: array of integer ids of source nodes
+        :param targets: array of integer ids of target nodes
+        :param value: 'value' attribute (cost) of all edges
+        """
+        sources = np.asarray(sources, dtype=np.intc)
+        targets = np.asarray(targets, dtype=np.intc)
+        if len(sources) and max(sources.max(), targets.max()) >= len(self.records):
+            raise IndexError("Edge of unknown node")
+        self.sources.extend(array('i', sources.tobytes()))
+        self.targets.extend(array('i', targets.tobytes()))
+        self.weights.extend(array('d', [NO_WEIGHT if value is None else value]) * len(sources))
+        self.offsets = None
+
+    def freeze(self):
+        """
+        Method for build CSR adjacency from added edges (vectorized by numpy).
+        Duplicate edges are merged (last added weight is used), neighbors are kept in order of first adding,
+        same as in networkx.
+        """
+        if self.offsets is not None:
+            return
+
+        count = len(self.records)
+        sources = np.frombuffer(self.sources, dtype=np.intc)
+        targets = np.frombuffer(self.targets, dtype=np.intc)
+        # both directions of each edge side by side, so edge ids are ascending, self-loop only once
+        nodes = np.empty(2 * len(sources), dtype=np.int64)
+        nodes[0::2], nodes[1::2] = sources, targets
+        neighbors = np.empty(2 * len(sources), dtype=np.int64)
+        neighbors[0::2], neighbors[1::2] = targets, sources
+        edge_ids = np.repeat(np.arange(len(sources), dtype=np.int64), 2)
+        keep = np.ones(len(nodes), dtype=bool)
+        keep[1::2] = sources != targets
+        nodes, neighbors, edge_ids = nodes[keep], neighbors[keep], edge_ids[keep]
+
+        # stable sort by (node, neighbor), duplicate edges are next to each other ordered by edge id
+        order = np.argsort(nodes * count + neighbors, kind='mergesort')
+        nodes, neighbors, edge_ids = nodes[order], neighbors[order], edge_ids[order]
+        first = np.ones(len(nodes), dtype=bool)
+        first[1:] = (nodes[1:] != nodes[:-1]) | (neighbors[1:] != neighbors[:-1])
+        last = np.ones(len(nodes), dtype=bool)
+        last[:-1] = first[1:]
+
+        nodes, neighbors, first_ids, last_ids = nodes[first], neighbors[first], edge_ids[first], edge_ids[last]
+        order = np.argsort(nodes * (len(sources) + 1) + first_ids)
+        offsets = np.zeros(count + 1, dtype=np.intc)
+        np.cumsum(np.bincount(nodes, minlength=count), out=offsets[1:])
+
+        self.offsets = array('i', offsets.tobytes())
+        self.neighbors = array('i', neighbors[order].astype(np.intc).tobytes())
+        self.edge_ids = array('i', last_ids[order].astype(np.intc).tobytes())
+
+    def edge_data(self, edge_id):
+        """
+        Method for get attributes of edge.
+        :param edge_id: ID of edge
+        :return: dict of edge attributes (new object, changes aren't stored)
+        """
+        weight = self.weights[edge_id]
+        return {} if weight != weight else {'value': int(weight) if weight.is_integer() else weight}
+
+    def adjacency(self):
+        """
+        Method for iterate over nodes with their neighbors.
+        :return: generator of (node, neighbors view) pairs
+        """
+        self.freeze()
+        for idx, record in enumerate(self.records):
+            yield record.name, NeighborView(self, idx)
+
+    def edges(self, data=False):
+        """
+        Method for iterate over edges (each edge once).
+        :param data: flag for include edge attributes
+        :return: generator of (u, v) or (u, v, data)
+        """
+        self.freeze()
+        for idx, record in enumerate(self.records):
+            for pos in range(self.offsets[idx], self.offsets[idx + 1]):
+                if self.neighbors[pos] >= idx:
+                    if data:
+                        yield record.name, self.records[self.neighbors[pos]].name, self.edge_data(self.edge_ids[pos])
+                    else:
+                        yield record.name, self.records[self.neighbors[pos]].name
+
+    def to_networkx(self):
+        """
+        Method for create networkx graph with same nodes, edges and attributes (for drawing/export).
+        :return: networkx graph
+        """
+        graph = nx.Graph()
+        graph.graph.update(self.graph)
+        for record in self.records:
+            graph.add_node(record.name, **record.data())
+        graph.add_edges_from(self.edges(data=True))
+        return graph
+
+    @classmethod
+    def from_networkx(cls, graph):
+        """
+        Method for create compact graph from networkx graph.
+        :param graph: undirected networkx graph
+        :return: compact graph
+        """
+        compact = cls()
+        compact.graph.update(graph.graph)
+        for node, data in graph.nodes(data=True):
+            compact.add_node(node, **data)
+        compact.add_edges_from(graph.edges(data=True))
+        return compact
+
+
+class NodeView(object):
+    """
+    Class representing read-only view of nodes of compact graph (like networkx NodeView).
+    """
+    __slots__ = ('compact', 'data')
+
+    def __init__(self, compact, data=False):
+        self.compact = compact
+        self.data = data
+
+    def __len__(self):
+        return len(self.compact.records)
+
+    def __iter__(self):
+        if self.data:
+            return ((record.name, record.data()) for record in self.compact.records)
+        return iter(self.compact)
+
+    def __contains__(self, node):
+        return node in self.compact.index
+
+    def __getitem__(self, node):
+        return self.compact.records[self.compact.index[node]].data()
+
+
+class NeighborView(object):
+    """
+    Class representing read-only view of neighbors of one node (like networkx adjacency dict).
+    """
+    __slots__ = ('compact', 'idx')
+
+    def __init__(self, compact, idx):
+        compact.freeze()
+        self.compact = compact
+        self.idx = idx
+
+    def positions(self):
+        return range(self.compact.offsets[self.idx], self.compact.offsets[self.idx + 1])
+
+    def __len__(self):
+        return self.compact.offsets[self.idx + 1] - self.compact.offsets[self.idx]
+
+    def __iter__(self):
+        return (self.compact.records[self.compact.neighbors[pos]].name for pos in self.positions())
+
+    def keys(self):
+        return list(self)
+
+    def items(self):
+        return [(self.compact.records[self.compact.neighbors[pos]].name,
+                 self.compact.edge_data(self.compact.edge_ids[pos])) for pos in self.positions()]
+
+    def __contains__(self, node):
+        idx = self.compact.index.get(node)
+        return idx is not None and any(self.compact.neighbors[pos] == idx for pos in self.positions())
+
+    def __getitem__(self, node):
+        idx = self.compact.index[node]
+        for pos in self.positions():
+            if self.compact.neighbors[pos] == idx:
+                return self.compact.edge_data(self.compact.edge_ids[pos])
+        raise KeyError(node)
@@ -1,54 +1,286 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+import hashlib
+import json
+import sys
+
 import networkx as nx
 
+from ports import BROKER_PORTS, ROUTER_PORTS, HostPacking, PortAllocator
+from templates import FrozenDict, listener_template
+
 # Default start port-value for  listeners/connectors
 # ATTENTION: be sure that ports [5672 - 5672+router_count] are free to use!
 DEFAULT_PORT = 5672
 # Default queue name for linkRoutes
 DEFAULT_QUEUE = 'default_queue'
+# Node attributes read by generators, indexed once per graph
+INDEXED_ATTRIBUTES = ('type', 'tier', 'host', 'router', 'listener', 'connector', 'linkRoute', 'address',
+                      'def_list', 'def_conn', 'def_addr')
+# Value of node attribute 'tier' of edge-mode routers (other routers are interior)
+EDGE_TIER = 'edge'
+# Fields identifying component, components with same values are duplicates
+COMPONENT_KEYS = {
+    'address': ('prefix', 'distribution'),
+    'linkRoute': ('prefix', 'connection', 'dir'),
+    'connector': ('name', 'host', 'port'),
+}
+# Addresses of router without user-defined addresses (shared by all routers, immutable)
+DEFAULT_ADDRESSES = (
+    FrozenDict({'prefix': 'closest', 'distribution': 'closest'}),
+    FrozenDict({'prefix': 'multicast', 'distribution': 'multicast'}),
+    FrozenDict({'prefix': 'unicast', 'distribution': 'closest'}),
+    FrozenDict({'prefix': 'exclusive', 'distribution': 'closest'}),
+    FrozenDict({'prefix': 'broadcast', 'distribution': 'multicast'}),
+)
+
+
+class ComponentList(object):
+    """
+    Class representing list of router components of one kind (addresses, linkRoutes, connectors)
+    merged by hashed canonical keys (see COMPONENT_KEYS), so duplicates are found in O(1).
+    """
+
+    def __init__(self, node, kind):
+        """
+        :param node: router ID
+        :param kind: kind of components (key of COMPONENT_KEYS)
+        """
+        self.node = node
+        self.kind = kind
+        self.fields = COMPONENT_KEYS[kind]
+        self.items = []
+        self.keys = set()
+
+    def key(self, item):
+        """
+        Method for get canonical key of component.
+        :param item: component
+        :return: hashable key
+        """
+        if isinstance(item, dict):
+            key = tuple(item.get(field) for field in self.fields)
+        else:
+            key = item
+        try:
+            hash(key)
+        except TypeError:
+            key = json.dumps(key, sort_keys=True, default=str)
+        return key
+
+    def add(self, item, user_defined=False):
+        """
+        Method for append component unless it's duplicate.
+        Duplicates in components defined by user are reported, default components are silently
+        replaced by user-defined ones.
+        :param item: component
+        :param user_defined: flag of component defined by user
+        :return: True when component was appended
+        """
+        key = self.key(item)
+        if key in self.keys:
+            if user_defined:
+                sys.stderr.write("Duplicate {} {} of router {} is ignored.\n".format(self.kind, item, self.node))
+            return False
+        self.keys.add(key)
+        self.items.append(item)
+        return True
+
+    def extend(self, items, user_defined=False):
+        """
+        Method for append components unless they are duplicates.
+        :param items: components
+        :param user_defined: flag of components defined by user
+        """
+        for item in items:
+            self.add(item, user_defined)
 
 
 def get_conf(graph):
     """
     Function for start generating config variables for routers.
+    Graph is only read, so configs can be generated repeatedly or concurrently from the same graph.
     :param graph: networkx graph of topology
     :return: config variables in json
     """
+    return dict(iter_conf(graph))
+
 
-    confs = {}
-    node_type = nx.get_node_attributes(graph, 'type')
+def iter_conf(graph, nodes=None, ports=None):
+    """
+    Generator of config variables for routers.
+    Config of router is yielded as soon as it's complete, listeners of neighbor routers
+    are generated in advance (connectors use ports of neighbor listeners).
+    :param graph: networkx graph of topology
+    :param nodes: set of routers to generate (default all routers)
+    :param ports: allocator filled with listener ports of generated routers and their neighbors
+    :return: generator of (router ID, config variables in json) pairs
+    """
+    attributes = index_node_attributes(graph)
+    node_type = attributes['type']
+    listeners = {}
+    if ports is None:
+        ports = PortAllocator(DEFAULT_PORT)
+    if ports.packing is None:
+        ports.packing = pack_hosts(attributes)
 
     for node, nbrdict in graph.adjacency():
-        if node_type[node] == 'broker':
+        if node_type[node] == 'broker' or (nodes is not None and node not in nodes):
             continue
         # init
-        confs.setdefault(node, {})
+        conf = {}
         # Generate router info
-        confs[node].update(generate_router_info(graph, node, nbrdict, node_type))
-        # Generate listeners
-        confs[node].update({'listener': generate_listeners(graph, node, nbrdict, node_type)})
+        conf.update(generate_router_info(graph, node, nbrdict, node_type, attributes))
+        # Generate listeners (unless they were generated for already processed neighbor)
+        if node not in listeners:
+            listeners[node] = generate_listeners(graph, node, nbrdict, node_type, attributes, ports)
+        conf.update({'listener': listeners[node]})
         # Generate addresses
-        confs[node].update({'address': generate_addresses(graph, node, nbrdict, node_type)})
+        conf.update({'address': generate_addresses(graph, node, nbrdict, node_type, attributes)})
         # Generate sslProfile and other connection settings
-        confs[node].update(generate_connection_settings(graph, node))
+        conf.update(generate_connection_settings(graph, node))
+
+        # Generate listeners of neighbor routers before connectors
+        for out in nbrdict.keys():
+            if node_type[out] == 'router' and out not in listeners:
+                listeners[out] = generate_listeners(graph, out, graph[out], node_type, attributes, ports)
 
-    # Generate connectors according of listeners
-    for node, nbrdict in graph.adjacency():
-        if node_type[node] == 'broker':
-            continue
         # Generate connectors with link-routes
-        connectors, link_routes = generate_connectors(graph, node, nbrdict, node_type)
+        connectors, link_routes = generate_connectors(graph, node, nbrdict, node_type, attributes, ports)
         if connectors:
-            confs[node].update({'connector': connectors})
+            conf.update({'connector': connectors})
         if link_routes:
-            confs[node].update({'linkRoute': link_routes})
+            conf.update({'linkRoute': link_routes})
+
+        yield node, conf
+
+
+def hash_nodes(graph):
+    """
+    Function for compute content hash of each node from everything its config depends on:
+    attributes of node and its adjacency (neighbors, their types, tiers and edge attributes).
+    Listeners of router depend on tiers of neighbors, so change of tier changes hashes of neighbors
+    and their neighbors (connectors) are regenerated too.
+    Ports of instance on shared host depend on other instances of host, so they are hashed too.
+    :param graph: networkx graph of topology
+    :return: dict of node -> hash
+    """
+    attributes = index_node_attributes(graph, ('type', 'tier', 'host', 'listener'))
+    node_type = attributes['type']
+    tier = attributes['tier']
+    instances = {}
+    for node, host in attributes['host'].items():
+        instances.setdefault(host, []).append([str(node), node_type.get(node), attributes['listener'].get(node)])
+    host_content = dict((host, sorted(items, key=lambda item: item[0])) for host, items in instances.items())
+    hashes = {}
+
+    for node, nbrdict in graph.adjacency():
+        # tier is hashed only when it's set, hashes of topologies without tiers aren't changed
+        adjacency = sorted(([str(out), node_type.get(out), data] + ([tier[out]] if out in tier else [])
+                            for out, data in nbrdict.items()), key=lambda item: item[0])
+        content = [graph.node[node], adjacency]
+        if node in attributes['host']:
+            content.append(host_content[attributes['host'][node]])
+        content = json.dumps(content, sort_keys=True, default=str)
+        hashes[node] = hashlib.sha1(content.encode('utf-8')).hexdigest()
+
+    return hashes
+
+
+def get_affected_routers(graph, previous, current):
+    """
+    Function for find routers which config has to be regenerated after change of graph.
+    Changed (or new) nodes and their neighbors are affected - connectors depend on listener ports of neighbors.
+    Neighbors of removed nodes are changed, their adjacency differs.
+    :param graph: networkx graph of topology (current)
+    :param previous: node hashes of previous graph
+    :param current: node hashes of current graph
+    :return: set of affected routers
+    """
+    node_type = index_node_attributes(graph, ('type',))['type']
+    changed = [node for node, digest in current.items() if previous.get(node) != digest]
+
+    affected = set(changed)
+    for node in changed:
+        affected.update(graph[node])
+
+    return set(node for node in affected if node_type[node] == 'router')
+
+
+def index_node_attributes(graph, names=INDEXED_ATTRIBUTES):
+    """
+    Function for index node attributes used by generators in single pass over graph.
+    :param graph: networkx graph of topology
+    :param names: names of indexed attributes
+    :return: dict of attribute name -> {node: value}
+    """
+    attributes = dict((name, {}) for name in names)
+
+    for node, data in graph.nodes(data=True):
+        for name, value in data.items():
+            if name in attributes:
+                attributes[name][node] = value
+
+    return attributes
+
+
+def allocate_ports(graph, attributes=None):
+    """
+    Function for allocate listener ports of all routers without generating rest of configs.
+    :param graph: networkx graph of topology
+    :param attributes: index of node attributes (see index_node_attributes)
+    :return: allocator with table of ports (see ports.PortAllocator)
+    """
+    if attributes is None:
+        attributes = index_node_attributes(graph)
+    node_type = attributes['type']
+    ports = PortAllocator(DEFAULT_PORT, pack_hosts(attributes))
+
+    for node, nbrdict in graph.adjacency():
+        if node_type[node] == 'router':
+            generate_listeners(graph, node, nbrdict, node_type, attributes, ports)
+
+    return ports
+
+
+def pack_hosts(attributes):
+    """
+    Function for allocate blocks of ports of instances packed onto shared hosts (node attribute host).
+    Ports of listeners defined by user are reserved first, then instances of each host get blocks
+    in order of their IDs, so ports don't depend on order of generating.
+    :param attributes: index of node attributes (see index_node_attributes)
+    :return: object of HostPacking (None when no node has host)
+    """
+    hosts = attributes['host']
+    if not hosts:
+        return None
+    packing = HostPacking(DEFAULT_PORT)
+
+    for node, host in hosts.items():
+        if node in attributes['listener']:
+            for item in append_defined_component(attributes['listener'], node):
+                if isinstance(item, dict):
+                    packing.reserve(host, item.get('port'))
+
+    for node in sorted(hosts, key=lambda item: (str(hosts[item]), str(item))):
+        packing.add(hosts[node], node, ROUTER_PORTS if attributes['type'].get(node) == 'router' else BROKER_PORTS)
 
-    return confs
+    return packing
 
 
-def generate_listeners(graph, node, nbrdict, node_type):
+def is_edge_router(node, attributes):
+    """
+    Function for check if router is in edge tier (node attribute tier: edge).
+    Edge routers connect only to their interior uplinks, they don't have inter-router links.
+    :param node: router ID
+    :param attributes: index of node attributes (see index_node_attributes)
+    :return: True for edge router
+    """
+    return attributes['tier'].get(node) == EDGE_TIER
+
+
+def generate_listeners(graph, node, nbrdict, node_type, attributes=None, ports=None):
     """
     Function for generate information about listeners.
     Generate default or self-defined values.
@@ -56,71 +288,48 @@ def generate_listeners(graph, node, nbrdict, node_type):
     :param node: current processing node
     :param nbrdict: list of neighbors
     :param node_type: type of nodes
+    :param attributes: index of node attributes (see index_node_attributes)
+    :param ports: allocator of listener ports (see ports.PortAllocator)
     :return: listeners variables in json
     """
-    list_vars = nx.get_node_attributes(graph, 'listener')
+    if attributes is None:
+        attributes = index_node_attributes(graph)
+    if ports is None:
+        ports = PortAllocator(DEFAULT_PORT, pack_hosts(attributes))
+    list_vars = attributes['listener']
 
     listeners = []
     neighbours = []
 
-    port = DEFAULT_PORT
-
     if node in list_vars:
-        if isinstance(list_vars[node], list):
-            listeners = list_vars[node]
-        else:
-            listeners = [list_vars[node]]
-    if node not in nx.get_node_attributes(graph, 'def_list') or listeners == []:
-        listeners.append(
-            {
-                'host': '0.0.0.0',
-                'port': str(port),
-                'role': 'normal',
-                'authenticatePeer': 'no',
-                'saslMechanisms': 'ANONYMOUS'
-            }
-        )
-        port += 1
-        for out in nbrdict.keys():
-            if node_type[out] == 'router':
-                listeners.append(
-                    {
-                        'host': '0.0.0.0',
-                        'port': str(port),
-                        'role': 'inter-router',
-                        'authenticatePeer': 'no',
-                        'saslMechanisms': 'ANONYMOUS'
-                    }
-                )
-                port += 1
-                break
+        # list defined by user is copied, defaults are appended to it
+        listeners = list(append_defined_component(list_vars, node))
+    ports.record_listeners(node, listeners)
+    if node not in attributes['def_list'] or listeners == []:
+        listeners.append(listener_template('normal', ports.allocate(node, 'normal')))
+        # edge routers don't accept router connections, they connect to their interior uplinks
+        if not is_edge_router(node, attributes):
+            for role, edge in [('inter-router', False), ('edge', True)]:
+                for out in nbrdict.keys():
+                    if node_type[out] == 'router' and is_edge_router(out, attributes) == edge:
+                        listeners.append(listener_template(role, ports.allocate(node, role)))
+                        break
 
         for out in nbrdict.keys():
             if node_type[out] == 'broker':
-                listeners.append(
-                    {
-                        'host': '0.0.0.0',
-                        'port': str(port),
-                        'role': 'route-container',
-                        'authenticatePeer': 'no',
-                        'saslMechanisms': 'ANONYMOUS'
-                    }
-                )
-                port += 1
+                listeners.append(listener_template('route-container', ports.allocate(node, 'route-container')))
                 break
 
-    # nx.set_node_attributes(graph, 'listener', 'test' )
-
-    graph.add_node(node, listener=listeners)
-
     return listeners
 
 
-def generate_connectors(graph, node, nbrdict, node_type):
+def generate_connectors(graph, node, nbrdict, node_type, attributes=None, ports=None):
     """
     Function for generate connectors.
     Connector for router is specified in graph_file: create it
     Connector for router is not specified in graph_file: create default connector with specific role 'inter-router'
+            and cost given by edge value (edge router creates connector with role 'edge' to each interior neighbor,
+            no connector to edge router)
     Connector for broker is specified in graph_file: check connector 'host' and linkRoute 'connection'
             if:     connector without linkRoute isn't created
             elif:   linkRoute without connector aren't created
@@ -130,75 +339,90 @@ def generate_connectors(graph, node, nbrdict, node_type):
     :param node: current processing node
     :param nbrdict: dict of outgoing edges from processing node
     :param node_type: type of all nodes
+    :param attributes: index of node attributes (see index_node_attributes)
+    :param ports: allocator with listener ports and hosts of neighbors (default listener ports of all routers
+                  are allocated, see allocate_ports)
     :return: connectors and linkRoutes variables in json
     """
 
-    conn_vars = nx.get_node_attributes(graph, 'connector')
-    link_vars = nx.get_node_attributes(graph, 'linkRoute')
-    connectors = []
-    link_route = []
+    if attributes is None:
+        attributes = index_node_attributes(graph)
+    if ports is None:
+        ports = allocate_ports(graph, attributes)
+    conn_vars = attributes['connector']
+    link_vars = attributes['linkRoute']
+    connectors = ComponentList(node, 'connector')
+    link_route = ComponentList(node, 'linkRoute')
 
     if node in conn_vars:
+        defined = append_defined_component(conn_vars, node)
         if node in link_vars:
-            for confs in conn_vars[node]:
-                if isinstance(confs, dict):
-                    for route in link_vars[node]:
-                        if confs.get('name') == route['connection']:
-                            link_route.append(route)
-                            connectors = conn_vars[node]
-
-        if not connectors:
-            connectors = append_defined_component(conn_vars, node)
+            # linkRoutes of defined connectors only
+            names = set(confs.get('name') for confs in defined if isinstance(confs, dict))
+            link_route.extend((route for route in link_vars[node] if route['connection'] in names),
+                              user_defined=True)
+        connectors.extend(defined, user_defined=True)
 
-    if node not in nx.get_node_attributes(graph, 'def_conn'):
+    if node not in attributes['def_conn']:
         # outgoing
-        for out in nbrdict.keys():
+        for out, edge in nbrdict.items():
             if node_type[out] == 'router':
-                connectors.append({
+                if is_edge_router(out, attributes):
+                    # edge router connects to its interior uplinks
+                    continue
+                role = 'edge' if is_edge_router(node, attributes) else 'inter-router'
+                connector = {
                     'name': out,
-                    'host': out,
-                    'port': get_neighbor_port(graph, out),  # same rule as above
-                    'role': 'inter-router'
-                })
+                    'host': ports.host(out),
+                    'port': ports.get(out, role),
+                    'role': role
+                }
+                # routing cost of inter-router connection is given by edge weight
+                if role == 'inter-router' and 'value' in edge:
+                    connector['cost'] = edge['value']
+                connectors.add(connector)
             elif node_type[out] == 'broker':
-                connectors.append({
+                connectors.add({
                     'name': out,
-                    'host': out,
-                    'port': str(DEFAULT_PORT),  # same rule as above
+                    'host': ports.host(out),
+                    'port': ports.broker_port(out),
                     'role': 'route-container'
                 })
-                link_route.append({
+                link_route.add({
                     'prefix': node + '_queue',
                     'connection': out,
                     'dir': 'in'
                 })
-                link_route.append({
+                link_route.add({
                     'prefix': node + '_queue',
                     'connection': out,
                     'dir': 'out'
                 })
 
-    graph.add_node(node, connectors=connectors)
-    graph.add_node(node, linkRoutes=link_route)
-
-    return connectors, link_route
+    return connectors.items, link_route.items
 
 
-def generate_router_info(graph, node, nbrdict, node_type):
+def generate_router_info(graph, node, nbrdict, node_type, attributes=None):
     """
     Function for generate information about router itself.
     :param graph: networkx graph of topology
     :param node: current processing node
     :param nbrdict: list of neighbors
     :param node_type: type of nodes
+    :param attributes: index of node attributes (see index_node_attributes)
     :return: router variables in json
     """
     router = {}
     mode = 'standalone'
-    rout_vars = nx.get_node_attributes(graph, 'router')
+    if attributes is None:
+        attributes = index_node_attributes(graph)
+    rout_vars = attributes['router']
 
     if node in rout_vars:
-        router = rout_vars[node][0]
+        # router defined by user is copied, ID is added to it
+        router = dict(rout_vars[node][0])
+    elif is_edge_router(node, attributes):
+        router['mode'] = 'edge'
     else:
         for out in nbrdict.keys():
             if node_type[out] == 'router' or node_type[out] == 'broker':
@@ -217,12 +441,10 @@ def generate_router_info(graph, node, nbrdict, node_type):
         ]
     }
 
-    graph.add_node(node, router=router_info)
-
     return router_info
 
 
-def generate_addresses(graph, node, nbrdict, node_type):
+def generate_addresses(graph, node, nbrdict, node_type, attributes=None):
     """
     Function for generate information about addresses.
     Generate default or self-defined values.
@@ -230,39 +452,21 @@ def generate_addresses(graph, node, nbrdict, node_type):
     :param node: current processing node
     :param nbrdict: list of neighbors
     :param node_type: type of nodes
+    :param attributes: index of node attributes (see index_node_attributes)
     :return: listeners variables in json
     """
-    address_vars = nx.get_node_attributes(graph, 'address')
+    if attributes is None:
+        attributes = index_node_attributes(graph)
+    address_vars = attributes['address']
 
-    address = []
-    neighbours = []
+    address = ComponentList(node, 'address')
 
     if node in address_vars:
-        address = append_defined_component(address_vars, node)
-    if node not in nx.get_node_attributes(graph, 'def_addr') or address == []:
-        item = {'prefix': 'closest', 'distribution': 'closest'}
-
-        if item not in address:
-            address.append(item)
-
-        item = {'prefix': 'multicast', 'distribution': 'multicast'}
-        if item not in address:
-            address.append(item)
-
-        item = {'prefix': 'unicast', 'distribution': 'closest'}
-        if item not in address:
-            address.append(item)
+        address.extend(append_defined_component(address_vars, node), user_defined=True)
+    if node not in attributes['def_addr'] or address.items == []:
+        address.extend(DEFAULT_ADDRESSES)
 
-        item = {'prefix': 'exclusive', 'distribution': 'closest'}
-        if item not in address:
-            address.append(item)
-
-        item = {'prefix': 'broadcast', 'distribution': 'multicast'}
-        if item not in address:
-            address.append(item)
-
-    graph.add_node(node, addresses=address)
-    return address
+    return address.items
 
 
 def generate_connection_settings(graph, node):
@@ -290,30 +494,6 @@ def generate_connection_settings(graph, node):
     return conn_sett
 
 
-def get_neighbor_port(graph, neighbor):
-    """
-    Function for get port for connector according neighbor listener port.
-    :param graph: graph
-    :param neighbor: neighbor name
-    :return: port number
-    """
-    test = graph.nodes(data=True)[neighbor]
-
-    try:
-        if 'listener' in test:
-            for item in test['listener']:
-
-                if 'role' in item:
-
-                    if 'inter-route' in item['role']:
-                        return item['port']
-
-                else:
-                    raise AttributeError
-    except AttributeError:
-        raise AttributeError("Listener doesn't contains role!")
-
-
 def append_defined_component(component, node):
     """
     Function for append components defined by user from graph metadata.
@@ -0,0 +1,288 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import abc
+import math
+import sys
+
+import networkx as nx
+import numpy as np
+
+from generate import EDGE_TIER
+
+# Entry point group of generator plugins, e.g. in setup.py of other package:
+#     entry_points={'msg_topgen.generators': ['ring_graph = my_package.generators:RingGenerator']}
+ENTRY_POINT_GROUP = 'msg_topgen.generators'
+
+
+class Generator(object):
+    """
+    Class representing generator of topology shape (plugin of Topology.create_graph).
+    Generator declares number of edges of created graph, so size of topology is known before it's created.
+    Subclass without edge_count or build can't be instantiated.
+    """
+    __metaclass__ = abc.ABCMeta
+
+    @abc.abstractmethod
+    def edge_count(self, routers, brokers):
+        """
+        Method for get expected number of edges.
+        :param routers: amount of routers
+        :param brokers: amount of brokers
+        :return: number of edges
+        """
+
+    @abc.abstractmethod
+    def build(self, topology, graph, routers, brokers):
+        """
+        Method for create edges of graph (nodes are already in graph).
+        :param topology: Topology (Topology.add_edges adds edges in bulk with cost)
+        :param graph: Graph
+        :param routers: List of routers ID
+        :param brokers: List of brokers ID
+        """
+
+
+class TopologyMethod(Generator):
+    """
+    Class representing generator implemented by method of Topology (original graph types).
+    """
+
+    def __init__(self, method, edge_count):
+        """
+        :param method: name of method of Topology
+        :param edge_count: function(routers, brokers) returning number of edges
+        """
+        self.method = method
+        self.count = edge_count
+
+    def edge_count(self, routers, brokers):
+        return self.count(routers, brokers)
+
+    def build(self, topology, graph, routers, brokers):
+        getattr(topology, self.method)(graph, routers, brokers)
+
+
+def distribute(count, targets):
+    """
+    Function for distribute nodes evenly (round robin) among target nodes.
+    :param count: amount of distributed nodes
+    :param targets: array of indexes of target nodes
+    :return: array of target indexes, one for each distributed node
+    """
+    return np.asarray(targets)[np.arange(count) % len(targets)] if count else np.zeros(0, dtype=int)
+
+
+def broker_edges(routers, brokers, targets):
+    """
+    Function for create edges of brokers connected to routers in round robin.
+    :param routers: amount of routers (indexes of brokers start behind routers)
+    :param brokers: amount of brokers
+    :param targets: array of indexes of routers which brokers are connected to
+    :return: tuple (sources, targets)
+    """
+    return np.arange(brokers) + routers, distribute(brokers, targets)
+
+
+class HubSpokeGenerator(Generator):
+    """
+    Class representing hub-and-spoke graph: first router is hub, other routers are connected only to hub and
+    brokers are evenly distributed to spoke routers.
+    """
+
+    def edge_count(self, routers, brokers):
+        return max(routers - 1, 0) + (brokers if routers else 0)
+
+    def build(self, topology, graph, routers, brokers):
+        if not routers:
+            return
+        spokes = np.arange(1, len(routers))
+        broker_sources, broker_targets = broker_edges(len(routers), len(brokers), spokes if len(spokes) else [0])
+        topology.add_edges(graph, list(routers) + list(brokers),
+                           np.concatenate([np.zeros(len(spokes), dtype=int), broker_sources]),
+                           np.concatenate([spokes, broker_targets]))
+
+
+class TreeGenerator(Generator):
+    """
+    Class representing k-ary tree of routers (first router is root), brokers are evenly distributed to leaves.
+    """
+
+    def __init__(self, arity=2):
+        """
+        :param arity: maximal number of children of router
+        """
+        self.arity = arity
+
+    def edge_count(self, routers, brokers):
+        return max(routers - 1, 0) + (brokers if routers else 0)
+
+    def build(self, topology, graph, routers, brokers):
+        if not routers:
+            return
+        children = np.arange(1, len(routers))
+        # routers without children
+        leaves = np.arange((len(routers) - 2) // self.arity + 1 if len(routers) > 1 else 0, len(routers))
+        broker_sources, broker_targets = broker_edges(len(routers), len(brokers), leaves)
+        topology.add_edges(graph, list(routers) + list(brokers),
+                           np.concatenate([(children - 1) // self.arity, broker_sources]),
+                           np.concatenate([children, broker_targets]))
+
+
+class TwoTierGenerator(Generator):
+    """
+    Class representing 2-tier graph: small full mesh of interior routers (square root of amount of routers),
+    each edge router (edge mode, node attribute tier: edge) is connected to one interior router
+    and brokers are evenly distributed to edge routers.
+    """
+
+    @staticmethod
+    def interior_count(routers):
+        """
+        Method for get amount of interior routers.
+        :param routers: amount of routers
+        :return: amount of interior routers (first routers of list)
+        """
+        return min(routers, max(1, int(math.sqrt(routers))))
+
+    def edge_count(self, routers, brokers):
+        interior = self.interior_count(routers)
+        return interior * (interior - 1) // 2 + routers - interior + (brokers if routers else 0)
+
+    def build(self, topology, graph, routers, brokers):
+        if not routers:
+            return
+        interior = self.interior_count(len(routers))
+        graph.add_nodes_from(routers[interior:], tier=EDGE_TIER)
+        mesh_sources, mesh_targets = np.triu_indices(interior, 1)
+        edge = np.arange(interior, len(routers))
+        broker_sources, broker_targets = broker_edges(len(routers), len(brokers),
+                                                      edge if len(edge) else np.arange(interior))
+        topology.add_edges(graph, list(routers) + list(brokers),
+                           np.concatenate([mesh_sources, edge, broker_sources]),
+                           np.concatenate([mesh_targets, distribute(len(edge), np.arange(interior)),
+                                           broker_targets]))
+
+
+class RandomRegularGenerator(Generator):
+    """
+    Class representing random regular graph of routers with bounded degree (reproducible by seed),
+    brokers are evenly distributed to routers.
+    """
+
+    def __init__(self, degree=3, seed=42):
+        """
+        :param degree: degree of each router (without brokers)
+        :param seed: seed of random generator
+        """
+        self.degree = degree
+        self.seed = seed
+
+    def router_degree(self, routers):
+        """
+        Method for get degree usable for amount of routers (lower than amount, product has to be even).
+        :param routers: amount of routers
+        :return: degree
+        """
+        degree = min(self.degree, max(routers - 1, 0))
+        return degree - 1 if degree * routers % 2 else degree
+
+    def edge_count(self, routers, brokers):
+        return routers * self.router_degree(routers) // 2 + (brokers if routers else 0)
+
+    def build(self, topology, graph, routers, brokers):
+        if not routers:
+            return
+        regular = nx.random_regular_graph(self.router_degree(len(routers)), len(routers), seed=self.seed)
+        edges = np.array(list(regular.edges()), dtype=int).reshape(-1, 2)
+        broker_sources, broker_targets = broker_edges(len(routers), len(brokers), np.arange(len(routers)))
+        topology.add_edges(graph, list(routers) + list(brokers),
+                           np.concatenate([edges[:, 0], broker_sources]),
+                           np.concatenate([edges[:, 1], broker_targets]))
+
+
+def line_edge_count(routers, brokers):
+    """
+    Function for get number of edges of line graph (see Topology.line_graph).
+    """
+    edges = max(routers - 1, 0) + max(brokers // 2 - 1, 0) + max(brokers - 1 - brokers // 2, 0)
+    if routers and brokers:
+        # single broker and router are connected twice by same edge
+        edges += 1 if routers == 1 and brokers == 1 else 2
+    return edges
+
+
+def cycle_edge_count(routers, brokers):
+    """
+    Function for get number of edges of cycle graph (see Topology.cycle_graph).
+    """
+    nodes = routers + brokers
+    # closing edge of two nodes is same as line edge, single node has self-loop
+    return nodes if nodes != 2 else 1
+
+
+GENERATORS = {
+    'complete_graph': TopologyMethod('complete_graph', lambda r, b: (r + b) * (r + b - 1) // 2),
+    'line_graph': TopologyMethod('line_graph', line_edge_count),
+    'line_mix_graph': TopologyMethod('line_mix_graph', lambda r, b: max(r + b - 1, 0)),
+    'cycle_graph': TopologyMethod('cycle_graph', cycle_edge_count),
+    'bus_graph': TopologyMethod('bus_graph', lambda r, b: max(r - 1, 0) + (b if r else 0)),
+    'hub_spoke_graph': HubSpokeGenerator(),
+    'tree_graph': TreeGenerator(),
+    'two_tier_graph': TwoTierGenerator(),
+    'random_regular_graph': RandomRegularGenerator(),
+}
+
+# Plugins are loaded on first request of unknown graph type (scanning of installed distributions is slow)
+_plugins_loaded = False
+
+
+def register_generator(name, generator):
+    """
+    Function for register generator of graph type.
+    :param name: name of graph type (graph_type in config file)
+    :param generator: instance of Generator
+    """
+    GENERATORS[name] = generator
+
+
+def load_plugins():
+    """
+    Function for register generators from entry points of installed packages.
+    Entry point can refer to Generator subclass or instance, broken plugin is reported and skipped.
+    """
+    global _plugins_loaded
+    if _plugins_loaded:
+        return
+    _plugins_loaded = True
+
+    try:
+        import pkg_resources
+    except ImportError:
+        return
+
+    for entry_point in pkg_resources.iter_entry_points(ENTRY_POINT_GROUP):
+        try:
+            generator = entry_point.load()
+            register_generator(entry_point.name, generator() if isinstance(generator, type) else generator)
+        except Exception as exc:
+            sys.stderr.write("Cannot load generator plugin {}: {}\n".format(entry_point, exc))
+
+
+def get_generator(name):
+    """
+    Function for get generator of graph type.
+    :param name: name of graph type
+    :return: instance of Generator or None for unknown graph type
+    """
+    if name not in GENERATORS:
+        load_plugins()
+    return GENERATORS.get(name)
+
+
+def generator_names():
+    """
+    Function for get names of all graph types (including plugins).
+    :return: sorted list of names
+    """
+    load_plugins()
+    return sorted(GENERATORS)
@@ -1,48 +1,354 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
+import collections
+import hashlib
 import json
 import os
+import re
+import sys
+from multiprocessing.pool import ThreadPool
 
+import arg_parser
+import generate
 from arg_parser import Config
-from generate import get_conf
+from generate import DEFAULT_PORT, iter_conf
+from ports import PortAllocator
+from profiling import GENERATE_FUNCTIONS, Profiler
+from qdrouterd import render_conf
+from report import count_links, create_report
+from routing import routing_table
 from topology import Topology
 
+# Serializers of router config for output files (format -> (file extension, function))
+SHARD_FORMATS = {
+    'json': ('.json', json.dumps),
+    'conf': ('.conf', render_conf),
+}
+# Number of threads writing output files
+SHARD_WORKERS = 8
+# Characters replaced in file names of router configs
+UNSAFE_FILENAME = re.compile(r'[^\w.-]', re.UNICODE)
+# Functions of this module measured with --profile (stages of output)
+OUTPUT_FUNCTIONS = ('write_confs', 'write_shards', 'write_routing_table', 'write_report', 'write_port_table')
 
-def generate_output(config, generated, topology):
+
+def get_output_dir(config):
     """
-    Function for generate final output (variables for ansible deployment, topology picture, etc.)
+    Function for create output dir of topology.
     :param config: object of parsed arguments with data for filename
-    :param generated: generated variables
-    :param topology: object of created topology
+    :return: basename of topology and path to its output dir
     """
-    # output
     basename = "%s_R%s_B%s" % (config.graph_type, config.routers, config.brokers)
     directory = os.path.join(config.out_dir, basename)
     if not os.path.isdir(directory):
         os.makedirs(directory)
+    return basename, directory
+
+
+def generate_output(config, generated, topology, ports=None):
+    """
+    Function for generate final output (variables for ansible deployment, topology picture, etc.)
+    :param config: object of parsed arguments with data for filename
+    :param generated: generated variables (dict or iterable of (router ID, variables) pairs)
+    :param topology: object of created topology
+    :param ports: allocator filled by generating of variables (ports are allocated again when it's not given)
+    """
+    # output
+    basename, directory = get_output_dir(config)
     filename = os.path.join(directory, "router_confs.json")
     # Export graph
-    topology.export_graph(os.path.join(directory, "topology.svg"), basename, config.graph_type)
+    if not config.no_image:
+        topology.export_graph(os.path.join(directory, "topology.svg"), basename, config.graph_type)
     # Export variables
+    if isinstance(generated, dict):
+        generated = generated.items()
+    counts = {}
+    if config.report:
+        generated = count_links(generated, counts)
+    if config.shard or config.output_format != 'json':
+        write_shards(os.path.join(directory, "routers"), generated, config.output_format)
+    else:
+        with open(filename, 'w') as f:
+            write_confs(f, (conf for _, conf in generated))
+    if config.routing_table:
+        write_routing_table(directory, topology)
+    if config.report:
+        write_report(directory, topology, counts)
+    if config.port_table:
+        if ports is None:
+            ports = generate.allocate_ports(topology.graph)
+        write_port_table(directory, ports)
+
+
+def generate_incremental_output(config, topology):
+    """
+    Function for generate output only for routers affected by change of graph since previous run.
+    Hashes of nodes are stored next to the output, whole output is generated when they
+    (or previous output in same format) don't exist. Node IDs are compared as strings (keys of stored JSON).
+    Requested report, routing and port tables are written when graph changed or when they don't exist yet.
+    :param config: object of parsed arguments with data for filename
+    :param topology: object of created topology
+    :return: set of regenerated routers (None if whole output was generated)
+    """
+    basename, directory = get_output_dir(config)
+    hashes_file = os.path.join(directory, "node_hashes.json")
+    routers_dir = os.path.join(directory, "routers")
+    sharded = config.shard or config.output_format != 'json'
+    # Hashes have to be computed before generating
+    current = generate.hash_nodes(topology.graph)
+    previous = load_json(hashes_file)
+    # JSON keys are strings, IDs of nodes from graph files can be numbers
+    stored = dict((str(node), digest) for node, digest in current.items())
+
+    if sharded:
+        output = load_json(os.path.join(routers_dir, "index.json"))
+        if output is not None and output.get('format') != config.output_format:
+            output = None
+    else:
+        output = load_json(os.path.join(directory, "router_confs.json"))
+
+    if previous is None or output is None:
+        routers = None
+        ports = PortAllocator(DEFAULT_PORT)
+        generate_output(config, iter_conf(topology.graph, ports=ports), topology, ports)
+    else:
+        routers = generate.get_affected_routers(topology.graph, dict((node, previous.get(str(node)))
+                                                                     for node in current), current)
+        removed = set(previous) - set(stored)
+        changed = bool(routers or removed)
+
+        def missing(name):
+            return changed or not os.path.isfile(os.path.join(directory, name))
+
+        if not config.no_image and missing("topology.svg"):
+            topology.export_graph(os.path.join(directory, "topology.svg"), basename, config.graph_type)
+        if config.report and missing("report.json"):
+            # report needs configs of all routers
+            counts = {}
+            collections.deque(count_links(iter_conf(topology.graph), counts), maxlen=0)
+            write_report(directory, topology, counts)
+
+        if changed:
+            generated = iter_conf(topology.graph, routers)
+
+            if sharded:
+                index = output['routers']
+                for node in removed:
+                    if node in index:
+                        os.remove(os.path.join(routers_dir, index.pop(node)))
+                write_shards(routers_dir, generated, config.output_format, index=index)
+            else:
+                # Single file has to be rewritten, configs of not affected routers are taken from it
+                confs = dict((str(conf['machine']), conf) for conf in output['confs'])
+                for node in removed:
+                    confs.pop(node, None)
+                confs.update((str(node), conf) for node, conf in generated)
+                with open(os.path.join(directory, "router_confs.json"), 'w') as f:
+                    write_confs(f, confs.values())
+
+        # costs of paths can change anywhere in the graph, table is computed again
+        if config.routing_table and missing("routing_table.json"):
+            write_routing_table(directory, topology)
+        if config.port_table and missing("port_table.json"):
+            write_port_table(directory, generate.allocate_ports(topology.graph))
+
+    with open(hashes_file, 'w') as f:
+        f.write(json.dumps(stored))
+
+    return routers
+
+
+def load_json(filename):
+    """
+    Function for load JSON file of previous output.
+    :param filename: path to file
+    :return: loaded data or None when file doesn't exist
+    """
+    if not os.path.isfile(filename):
+        return None
+    with open(filename, 'r') as f:
+        return json.load(f)
+
+
+def write_confs(stream, confs):
+    """
+    Function for write configs of routers as JSON document {"confs": [...]}.
+    Configs are serialized and written one by one, so whole document is never held in memory.
+    :param stream: opened output file
+    :param confs: iterable of router configs
+    """
+    stream.write('{"confs": [')
+    for idx, conf in enumerate(confs):
+        if idx:
+            stream.write(', ')
+        stream.write(json.dumps(conf))
+    stream.write(']}')
+
+
+def write_port_table(directory, ports):
+    """
+    Function for write listener ports of all routers and port map of shared hosts into port_table.json:
+    {"routers": {router: {role: port}}, "hosts": {host: {instance: [first port, last port]}}}.
+    :param directory: path to output dir
+    :param ports: allocator with ports of all routers (see ports.PortAllocator)
+    """
+    with open(os.path.join(directory, "port_table.json"), 'w') as f:
+        f.write(json.dumps({'routers': ports.export(), 'hosts': ports.export_hosts()}))
+
+
+def write_report(directory, topology, counts):
+    """
+    Function for write report of topology into report.json (see report.create_report).
+    :param directory: path to output dir
+    :param topology: object of created topology
+    :param counts: counts of listeners and connectors of all routers (see report.count_links)
+    """
+    with open(os.path.join(directory, "report.json"), 'w') as f:
+        f.write(json.dumps(create_report(topology.graph, counts)))
+
+
+def write_routing_table(directory, topology):
+    """
+    Function for write cost/hop table of all pairs of routers into routing_table.json.
+    Table is written source by source: {"routers": {source: {target: {"cost", "hops", "next_hop"}}}}.
+    :param directory: path to output dir
+    :param topology: object of created topology
+    """
+    with open(os.path.join(directory, "routing_table.json"), 'w') as f:
+        f.write('{"routers": {')
+        for idx, (source, paths) in enumerate(routing_table(topology.graph).items()):
+            if idx:
+                f.write(', ')
+            f.write('%s: %s' % (json.dumps(source), json.dumps(paths)))
+        f.write('}}')
+
+
+def write_shards(directory, generated, output_format='json', workers=SHARD_WORKERS, index=None):
+    """
+    Function for write config of each router into own file <directory>/<router_id>.<format>
+    (see shard_name) and index file <directory>/index.json with mapping router ID -> file name.
+    Files are written by pool of threads, configs are consumed in chunks, so only chunk of configs is held in memory.
+    :param directory: path to output dir for router files
+    :param generated: iterable of (router ID, config) pairs
+    :param output_format: format of files (key of SHARD_FORMATS)
+    :param workers: number of writing threads
+    :param index: index of previously written files, which are kept
+    :return: index of files
+    """
+    extension, serialize = SHARD_FORMATS[output_format]
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+
+    index = dict(index or {})
+    chunk = []
+    pool = ThreadPool(workers)
+    try:
+        for router_id, conf in generated:
+            key = u'%s' % (router_id,)
+            index[key] = shard_name(key, extension)
+            chunk.append((os.path.join(directory, index[key]), serialize, conf))
+            if len(chunk) >= workers * 64:
+                pool.map(write_shard, chunk)
+                chunk = []
+        pool.map(write_shard, chunk)
+    finally:
+        pool.close()
+        pool.join()
+
+    with open(os.path.join(directory, "index.json"), 'w') as f:
+        f.write(json.dumps({'format': output_format, 'routers': index}))
+
+    return index
+
+
+def shard_name(router_id, extension):
+    """
+    Function for create file name of router config, characters which aren't safe in file name (e.g. path
+    separators) are replaced, hash of ID is appended to such name, so different IDs never share file.
+    :param router_id: router ID (string)
+    :param extension: extension of file
+    :return: file name
+    """
+    name = UNSAFE_FILENAME.sub('_', router_id)
+    if name != router_id:
+        name += '-' + hashlib.sha1(router_id.encode('utf-8')).hexdigest()[:8]
+    return name + extension
+
+
+def write_shard(task):
+    """
+    Function for write config of one router (executed in thread pool).
+    :param task: tuple (path to file, serializer, config)
+    """
+    filename, serialize, conf = task
     with open(filename, 'w') as f:
-        f.write(json.dumps({'confs': generated.values()}))
+        f.write(serialize(conf))
+
+
+def create_topology(config):
+    """
+    Function for create topology by defined input (graph file or graph type with hosts).
+    :param config: object of parsed arguments
+    :return: object of created topology
+    """
+    # New instance of topology
+    topology = Topology(cache_dir=config.cache_dir, backend=config.backend)
+    # Create graph by defined input
+    if config.graph_file:
+        topology.load_graph_from_json(config.graph_file, config.streaming)
+    else:
+        topology.create_graph(list(config.router_names), list(config.broker_names), config.graph_type)
+    # Several instances can run on one host
+    if config.host_map:
+        topology.assign_hosts(config.host_map)
+    return topology
+
+
+def write_profile(directory, profiler, config):
+    """
+    Function for write timing report into profile.json (and cProfile stats into profile.prof).
+    :param directory: path to output dir
+    :param profiler: object of profiler
+    :param config: object of parsed arguments
+    """
+    if config.cprofile:
+        profiler.dump_cprofile(os.path.join(directory, "profile.prof"))
+    with open(os.path.join(directory, "profile.json"), 'w') as f:
+        f.write(json.dumps(profiler.report()))
 
 
 def main():
     """
     Main
     """
+    # Stages are measured always (it's cheap), report is written only with --profile
+    profiler = Profiler()
+    # Inventory is parsed together with arguments, so it's measured as function
+    profiler.instrument(arg_parser, ['parse_inventory'])
     # Parse arguments
     config = Config()
-    config.args_parse()
-    # New instance of topology
-    topology = Topology()
-    # Create graph by defined input
-    if config.graph_file:
-        topology.load_graph_from_json(config.graph_file)
+    with profiler.stage('arguments'):
+        config.args_parse()
+    if config.profile:
+        profiler.instrument(generate, GENERATE_FUNCTIONS)
+        profiler.instrument(sys.modules[__name__], OUTPUT_FUNCTIONS)
+        profiler.instrument(Topology, ['export_graph'])
     else:
-        topology.create_graph(config.router_names, config.broker_names, config.graph_type)
-    # Generate variables
-    generated = get_conf(topology.graph)
-    # Generate final output with graph picture
-    generate_output(config, generated, topology)
+        profiler.restore()
+    if config.cprofile:
+        profiler.enable_cprofile()
+    # Create topology
+    with profiler.stage('graph'):
+        topology = create_topology(config)
+    # Configs are generated lazily while output is written, so their generation is part of output stage
+    with profiler.stage('output'):
+        if config.incremental:
+            # Regenerate only routers affected by change of graph
+            generate_incremental_output(config, topology)
+        else:
+            # Generate final output with graph picture
+            ports = PortAllocator(DEFAULT_PORT)
+            generate_output(config, iter_conf(topology.graph, ports=ports), topology, ports)
+    if config.profile:
+        profiler.restore()
+        write_profile(get_output_dir(config)[1], profiler, config)
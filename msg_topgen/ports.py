@@ -0,0 +1,245 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import bisect
+
+# Highest port number
+MAX_PORT = 65535
+# Ports reserved for each router instance on shared host (listeners normal, inter-router, edge, route-container)
+ROUTER_PORTS = 4
+# Ports reserved for each broker instance on shared host
+BROKER_PORTS = 1
+
+
+class PortAllocator(object):
+    """
+    Class representing allocation of listener ports of routers.
+    Ports of each router are numbered from base port (or from start of its block on shared host),
+    first listener of each role is recorded into table router -> role -> port, so connectors of neighbors
+    read port of their listener in O(1).
+    """
+
+    def __init__(self, base, packing=None):
+        """
+        :param base: first port of each router
+        :param packing: instances packed onto shared hosts (see HostPacking)
+        """
+        self.base = base
+        self.packing = packing
+        self.next_port = {}
+        self.table = {}
+        # routers with listener without role (roles of following listeners are unknown)
+        self.invalid = set()
+
+    def allocate(self, node, role):
+        """
+        Method for allocate next free port of router for listener with given role.
+        :param node: router ID
+        :param role: role of listener
+        :return: port (string as in listener)
+        """
+        if self.packing is not None and node in self.packing:
+            _, start, size = self.packing.blocks[node]
+            port = self.next_port.get(node, start)
+            if port >= start + size:
+                raise ValueError("Router %s needs more than %d ports!" % (node, size))
+        else:
+            port = self.next_port.get(node, self.base)
+        self.next_port[node] = port + 1
+        self.record(node, role, str(port))
+        return str(port)
+
+    def record(self, node, role, port):
+        """
+        Method for record port of listener (first listener of role is used by connectors).
+        :param node: router ID
+        :param role: role of listener
+        :param port: port of listener
+        """
+        if node not in self.invalid:
+            self.table.setdefault(node, {}).setdefault(role, port)
+
+    def record_listeners(self, node, listeners):
+        """
+        Method for record ports of listeners defined by user.
+        :param node: router ID
+        :param listeners: listeners variables in json
+        """
+        self.table.setdefault(node, {})
+        for item in listeners:
+            if 'role' not in item:
+                self.invalid.add(node)
+                break
+            self.record(node, item['role'], item.get('port'))
+
+    def __contains__(self, node):
+        return node in self.table
+
+    def get(self, node, role):
+        """
+        Method for get port of router listener with given role.
+        :param node: router ID
+        :param role: role of listener
+        :return: port or None when router doesn't have such listener
+        """
+        port = self.table.get(node, {}).get(role)
+        if port is None and node in self.invalid:
+            raise AttributeError("Listener doesn't contains role!")
+        return port
+
+    def host(self, node):
+        """
+        Method for get host which is connected to reach instance.
+        :param node: instance ID
+        :return: shared host of instance or instance ID (instance has own host)
+        """
+        if self.packing is not None and node in self.packing:
+            return self.packing.host(node)
+        return node
+
+    def broker_port(self, node):
+        """
+        Method for get port of broker.
+        :param node: broker ID
+        :return: port (string as in connector)
+        """
+        if self.packing is not None and node in self.packing:
+            return str(self.packing.blocks[node][1])
+        return str(self.base)
+
+    def export(self):
+        """
+        Method for export table of ports (for firewall or port planning).
+        :return: dict router -> role -> port
+        """
+        return dict((node, dict(roles)) for node, roles in self.table.items())
+
+    def export_hosts(self):
+        """
+        Method for export port map of shared hosts.
+        :return: dict host -> instance -> [first port, last port]
+        """
+        return {} if self.packing is None else self.packing.export()
+
+
+class PortRanges(object):
+    """
+    Class representing used ports of one host as sorted disjoint ranges [start, end).
+    Adjacent ranges are merged, so blocks allocated one after another are kept as single range.
+    """
+
+    def __init__(self, base):
+        """
+        :param base: lowest port allocated on host
+        """
+        self.base = base
+        self.starts = []
+        self.ends = []
+        # size -> port below which no block of this size is free (ports are never released)
+        self.lowest = {}
+
+    def reserve(self, start, size=1):
+        """
+        Method for mark range of ports as used.
+        :param start: first port
+        :param size: number of ports
+        """
+        end = start + size
+        # ranges overlapping or touching [start, end) are merged with it
+        first = bisect.bisect_left(self.ends, start)
+        last = bisect.bisect_right(self.starts, end)
+        if first < last:
+            start = min(start, self.starts[first])
+            end = max(end, self.ends[last - 1])
+        self.starts[first:last] = [start]
+        self.ends[first:last] = [end]
+
+    def allocate(self, size):
+        """
+        Method for allocate lowest free block of ports (first fit from base port).
+        :param size: number of ports
+        :return: first port of block
+        """
+        start = self.lowest.get(size, self.base)
+        for idx in range(bisect.bisect_right(self.ends, start), len(self.starts)):
+            if start + size <= self.starts[idx]:
+                break
+            start = max(start, self.ends[idx])
+        self.lowest[size] = start
+        if start + size - 1 > MAX_PORT:
+            raise ValueError("No free range of %d ports from %d!" % (size, self.base))
+        self.reserve(start, size)
+        return start
+
+    def __contains__(self, port):
+        idx = bisect.bisect_right(self.starts, port) - 1
+        return idx >= 0 and port < self.ends[idx]
+
+
+class HostPacking(object):
+    """
+    Class representing instances (routers, brokers) packed onto shared hosts.
+    Each instance gets own block of ports on its host, blocks don't overlap each other
+    and ports of listeners defined by user.
+    """
+
+    def __init__(self, base):
+        """
+        :param base: lowest port allocated on each host
+        """
+        self.base = base
+        self.ranges = {}
+        self.blocks = {}
+
+    def host_ranges(self, host):
+        """
+        Method for get used ports of host.
+        :param host: host name
+        :return: object of PortRanges
+        """
+        if host not in self.ranges:
+            self.ranges[host] = PortRanges(self.base)
+        return self.ranges[host]
+
+    def reserve(self, host, port):
+        """
+        Method for reserve port used by listener defined by user.
+        :param host: host name
+        :param port: port (ports which aren't numbers are ignored)
+        """
+        try:
+            self.host_ranges(host).reserve(int(port))
+        except (TypeError, ValueError):
+            pass
+
+    def add(self, host, instance, size):
+        """
+        Method for allocate block of ports for instance on host.
+        :param host: host name
+        :param instance: instance ID
+        :param size: number of ports
+        :return: first port of block
+        """
+        start = self.host_ranges(host).allocate(size)
+        self.blocks[instance] = (host, start, size)
+        return start
+
+    def __contains__(self, instance):
+        return instance in self.blocks
+
+    def host(self, instance):
+        """
+        Method for get host of instance.
+        :param instance: instance ID
+        :return: host name
+        """
+        return self.blocks[instance][0]
+
+    def export(self):
+        """
+        Method for export port map of hosts.
+        :return: dict host -> instance -> [first port, last port]
+        """
+        hosts = dict((host, {}) for host in self.ranges)
+        for instance, (host, start, size) in self.blocks.items():
+            hosts[host][instance] = [start, start + size - 1]
+        return hosts
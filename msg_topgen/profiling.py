@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import contextlib
+import cProfile
+import functools
+import inspect
+import sys
+import time
+
+try:
+    import resource
+except ImportError:
+    # Windows
+    resource = None
+
+# Functions of generate.py measured with --profile (generators of config sections, port allocation)
+GENERATE_FUNCTIONS = ('index_node_attributes', 'hash_nodes', 'get_affected_routers', 'allocate_ports', 'pack_hosts',
+                      'generate_router_info', 'generate_listeners', 'generate_addresses',
+                      'generate_connection_settings', 'generate_connectors')
+
+
+def usage():
+    """
+    Function for get current resource usage of process.
+    CPU time includes finished child processes (pool of routing table), peak memory is high-water mark of RSS.
+    :return: tuple (wall time [s], CPU time [s] or None, peak memory [kB] or None)
+    """
+    if resource is None:
+        return time.time(), None, None
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    # ru_maxrss is in bytes on macOS, in kilobytes elsewhere
+    peak = own.ru_maxrss // 1024 if sys.platform == 'darwin' else own.ru_maxrss
+    return time.time(), own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime, peak
+
+
+def difference(start, end):
+    """
+    Function for compute usage between two points (see usage).
+    :param start: usage at start
+    :param end: usage at end
+    :return: tuple (wall time, CPU time, growth of peak memory)
+    """
+    return tuple(None if begin is None else finish - begin for begin, finish in zip(start, end))
+
+
+class Profiler(object):
+    """
+    Class representing measurement of pipeline: wall time, CPU time and peak memory of stages
+    and of instrumented functions (their calls are summed, times of nested calls are included in callers).
+    """
+
+    def __init__(self):
+        self.stages = []
+        self.functions = {}
+        self.patched = []
+        self.cprofile = None
+        self.start = usage()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """
+        Method for measure stage of pipeline (context manager).
+        :param name: name of stage
+        """
+        start = usage()
+        try:
+            yield
+        finally:
+            end = usage()
+            wall, cpu, growth = difference(start, end)
+            self.stages.append({'name': name, 'wall': round(wall, 6), 'cpu': cpu and round(cpu, 6),
+                                'peak_memory_kb': end[2], 'peak_growth_kb': growth})
+
+    def instrument(self, owner, names):
+        """
+        Method for replace functions of module (or methods of class) by measured wrappers.
+        Functions have to be looked up through owner by their callers (e.g. module globals), see restore.
+        :param owner: module or class
+        :param names: names of functions
+        """
+        for name in names:
+            function = vars(owner)[name] if inspect.isclass(owner) else getattr(owner, name)
+            label = '%s.%s' % (owner.__name__.split('.')[-1], name)
+            setattr(owner, name, self.wrap(label, function))
+            self.patched.append((owner, name, function))
+
+    def wrap(self, label, function):
+        """
+        Method for create measured wrapper of function.
+        :param label: name of function in report
+        :param function: wrapped function
+        :return: wrapper
+        """
+        record = self.functions.setdefault(label, {'calls': 0, 'wall': 0.0, 'cpu': 0.0, 'peak_growth_kb': 0})
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            start = usage()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                wall, cpu, growth = difference(start, usage())
+                record['calls'] += 1
+                record['wall'] += wall
+                record['cpu'] = None if cpu is None else record['cpu'] + cpu
+                record['peak_growth_kb'] = None if growth is None else record['peak_growth_kb'] + growth
+
+        return wrapper
+
+    def restore(self):
+        """
+        Method for put back original functions replaced by instrument.
+        """
+        while self.patched:
+            owner, name, function = self.patched.pop()
+            setattr(owner, name, function)
+
+    def enable_cprofile(self):
+        """
+        Method for start cProfile of whole process.
+        """
+        self.cprofile = cProfile.Profile()
+        self.cprofile.enable()
+
+    def dump_cprofile(self, filename):
+        """
+        Method for stop cProfile and dump its stats (readable by pstats module).
+        :param filename: path to output file
+        """
+        self.cprofile.disable()
+        self.cprofile.dump_stats(filename)
+
+    def report(self):
+        """
+        Method for create timing report.
+        :return: report in json
+        """
+        wall, cpu, _ = difference(self.start, usage())
+        functions = dict((label, dict(record, wall=round(record['wall'], 6),
+                                      cpu=record['cpu'] and round(record['cpu'], 6)))
+                         for label, record in self.functions.items())
+        return {
+            'total': {'wall': round(wall, 6), 'cpu': cpu and round(cpu, 6), 'peak_memory_kb': usage()[2]},
+            'stages': self.stages,
+            'functions': functions,
+        }
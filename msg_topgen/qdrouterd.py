@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+# Entities of qdrouterd.conf in order of rendering, other components of config aren't rendered
+SECTIONS = ('router', 'sslProfile', 'authServicePlugin', 'listener', 'connector', 'address', 'linkRoute',
+            'autoLink', 'exchange', 'binding', 'log', 'policy', 'vhost', 'console')
+
+# Cache of compiled section formats: (section, attribute names) -> format string
+_FORMATS = {}
+
+
+def render_conf(conf):
+    """
+    Function for render qdrouterd.conf from config variables of router (see generate.get_conf).
+    :param conf: config variables of one router
+    :return: content of qdrouterd.conf
+    """
+    sections = []
+
+    for section in SECTIONS:
+        for entity in conf.get(section) or []:
+            sections.append(render_section(section, entity))
+
+    return '\n'.join(sections)
+
+
+def render_section(section, entity):
+    """
+    Function for render one section of qdrouterd.conf.
+    Format of section is compiled once for each combination of section and attribute names.
+    :param section: name of section (entity type)
+    :param entity: dict with attributes of entity
+    :return: rendered section
+    """
+    names = tuple(sorted(entity))
+    key = (section, names)
+
+    if key not in _FORMATS:
+        _FORMATS[key] = compile_format(section, names)
+
+    return _FORMATS[key] % tuple(format_value(entity[name]) for name in names)
+
+
+def compile_format(section, names):
+    """
+    Function for create format string of section.
+    :param section: name of section
+    :param names: sorted attribute names
+    :return: format string with placeholder for each attribute value
+    """
+    lines = [section + ' {']
+    for name in names:
+        lines.append('    %s: %%s' % name.replace('%', '%%'))
+    lines.append('}\n')
+
+    return '\n'.join(lines)
+
+
+def format_value(value):
+    """
+    Function for format attribute value in qdrouterd.conf syntax.
+    :param value: attribute value
+    :return: formatted value
+    """
+    if isinstance(value, bool):
+        return 'yes' if value else 'no'
+    if isinstance(value, (list, tuple)):
+        return ', '.join('%s' % format_value(item) for item in value)
+    return value
@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import collections
+
+import networkx as nx
+
+from generate import index_node_attributes
+from routing import routing_graph
+
+# Roles of connectors between routers
+ROUTER_ROLES = ('inter-router', 'edge')
+# Diameter is exact (BFS from each router) when routers * links is not bigger, otherwise it's estimated
+EXACT_WORK = 5000000
+# Number of BFS sweeps of diameter estimation (each sweep starts from farthest router of previous one),
+# distances of sweeps give estimated (lower bound) eccentricity of each router
+SWEEPS = 4
+
+
+def count_links(generated, counts):
+    """
+    Generator passing configs of routers through while counting their listeners and connectors.
+    :param generated: iterable of (router ID, config) pairs
+    :param counts: dict filled with router ID -> counts (names of router connectors, i.e. IDs of neighbor routers,
+                   are kept for incoming counts, host of connector can be host shared by several routers)
+    :return: generator of same (router ID, config) pairs
+    """
+    for node, conf in generated:
+        connectors = conf.get('connector') or []
+        counts[node] = {
+            'listeners': len(conf.get('listener') or []),
+            'connectors': len(connectors),
+            'router_neighbors': [item.get('name') for item in connectors if item.get('role') in ROUTER_ROLES]
+        }
+        yield node, conf
+
+
+def bfs_distances(adjacency, source):
+    """
+    Function for compute distances (hops) from source to all reachable nodes by breadth-first search.
+    :param adjacency: dict node -> list of neighbors
+    :param source: source node
+    :return: dict node -> hops
+    """
+    distances = {source: 0}
+    queue = collections.deque([source])
+
+    while queue:
+        node = queue.popleft()
+        for out in adjacency[node]:
+            if out not in distances:
+                distances[out] = distances[node] + 1
+                queue.append(out)
+
+    return distances
+
+
+def connected_components(adjacency):
+    """
+    Function for split nodes into connected components.
+    :param adjacency: dict node -> list of neighbors
+    :return: list of components (lists of nodes)
+    """
+    visited = set()
+    components = []
+
+    for node in adjacency:
+        if node not in visited:
+            component = list(bfs_distances(adjacency, node))
+            visited.update(component)
+            components.append(component)
+
+    return components
+
+
+def graph_diameter(adjacency, components, exact):
+    """
+    Function for compute diameter (maximal hops of shortest path inside of component).
+    Exact computation runs BFS from each node (it gives eccentricity of each node too), estimation runs few
+    double sweeps per component (lower bound, exact for trees) and eccentricity of node is estimated
+    by its farthest distance from starts of sweeps (lower bound too).
+    :param adjacency: dict node -> list of neighbors
+    :param components: connected components
+    :param exact: flag for exact computation
+    :return: tuple (diameter, dict node -> eccentricity)
+    """
+    diameter = 0
+    eccentricity = {}
+
+    for component in components:
+        if exact:
+            for node in component:
+                eccentricity[node] = max(bfs_distances(adjacency, node).values())
+                diameter = max(diameter, eccentricity[node])
+        else:
+            node = component[0]
+            longest = -1
+            for _ in range(SWEEPS):
+                distances = bfs_distances(adjacency, node)
+                for out, hops in distances.items():
+                    if hops > eccentricity.get(out, -1):
+                        eccentricity[out] = hops
+                node = max(distances, key=distances.get)
+                if distances[node] <= longest:
+                    break
+                longest = distances[node]
+            diameter = max(diameter, longest)
+
+    return diameter, eccentricity
+
+
+def create_report(graph, counts):
+    """
+    Function for create report of topology: degree, links and connections of each router and metrics
+    of router network (links between routers used by routers, see routing.routing_graph).
+    :param graph: graph of topology
+    :param counts: counts of listeners and connectors from configs (see count_links)
+    :return: report in json
+    """
+    node_type = index_node_attributes(graph, ('type',))['type']
+    costs, _ = routing_graph(graph)
+    adjacency = dict((node, [out for out, _ in links]) for node, links in costs.items())
+    links = sum(len(neighbors) for neighbors in adjacency.values()) // 2
+
+    components = connected_components(adjacency)
+    exact = len(adjacency) * max(links, 1) <= EXACT_WORK
+    diameter, eccentricity = graph_diameter(adjacency, components, exact)
+
+    incoming = collections.Counter(out for count in counts.values() for out in count['router_neighbors'])
+    routers = {}
+    for node, nbrdict in graph.adjacency():
+        if node_type[node] != 'router':
+            continue
+        router_links = len([out for out in nbrdict if node_type[out] == 'router'])
+        count = counts.get(node, {'listeners': 0, 'connectors': 0, 'router_neighbors': []})
+        routers[node] = {
+            'degree': len(nbrdict),
+            'router_links': router_links,
+            'broker_links': len(nbrdict) - router_links,
+            'listeners': count['listeners'],
+            'connectors': count['connectors'],
+            'router_connections': len(count['router_neighbors']) + incoming[node],
+        }
+        if node in eccentricity:
+            routers[node]['max_hops'] = eccentricity[node]
+
+    degrees = [router['degree'] for router in routers.values()] or [0]
+
+    return {
+        'routers': routers,
+        'summary': {
+            'routers': len(routers),
+            'brokers': len(node_type) - len(routers),
+            'router_links': links,
+            'degree': {'min': min(degrees), 'max': max(degrees), 'mean': float(sum(degrees)) / len(degrees)},
+            'degree_distribution': dict((str(degree), count)
+                                        for degree, count in collections.Counter(degrees).items()),
+            'max_router_connections': max([router['router_connections'] for router in routers.values()] or [0]),
+            'components': len(components),
+            'diameter': diameter,
+            'diameter_exact': exact,
+            'max_hops_exact': exact,
+            'articulation_points': sorted(nx.articulation_points(nx.Graph(adjacency))),
+        }
+    }
@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import heapq
+import multiprocessing
+
+from generate import EDGE_TIER, index_node_attributes
+
+# Cost of link without edge value (default cost of qdrouterd connector)
+DEFAULT_COST = 1
+# Smaller amount of routers is computed without pool of processes
+POOL_THRESHOLD = 200
+
+# Adjacency shared by worker processes (set by initializer of pool)
+_adjacency = None
+_edge_routers = None
+
+
+def routing_graph(graph):
+    """
+    Function for create adjacency of routers used by router network (links to brokers aren't routed,
+    links between edge routers aren't created, see generate.generate_connectors).
+    :param graph: graph of topology
+    :return: tuple (dict router -> list of (neighbor, cost), set of edge routers)
+    """
+    attributes = index_node_attributes(graph, ('type', 'tier'))
+    node_type = attributes['type']
+    edge_routers = set(node for node, tier in attributes['tier'].items() if tier == EDGE_TIER)
+    adjacency = {}
+
+    for node, nbrdict in graph.adjacency():
+        if node_type[node] != 'router':
+            continue
+        adjacency[node] = [(out, data.get('value', DEFAULT_COST)) for out, data in nbrdict.items()
+                           if node_type[out] == 'router' and not (node in edge_routers and out in edge_routers)]
+
+    return adjacency, edge_routers
+
+
+def shortest_paths(adjacency, edge_routers, source):
+    """
+    Function for compute paths from source router to all reachable routers by Dijkstra algorithm.
+    Paths with equal cost are resolved by lower number of hops. Edge routers don't forward traffic
+    between their uplinks, so they are only endpoints of paths.
+    :param adjacency: dict router -> list of (neighbor, cost)
+    :param edge_routers: set of edge routers
+    :param source: source router
+    :return: dict target -> {'cost': ..., 'hops': ..., 'next_hop': ...}
+    """
+    paths = {}
+    queue = [(0, 0, source, None)]
+
+    while queue:
+        cost, hops, node, next_hop = heapq.heappop(queue)
+        if node in paths:
+            continue
+        paths[node] = {'cost': cost, 'hops': hops, 'next_hop': next_hop}
+        if node != source and node in edge_routers:
+            continue
+        for out, link_cost in adjacency[node]:
+            if out not in paths:
+                heapq.heappush(queue, (cost + link_cost, hops + 1, out, next_hop if node != source else out))
+
+    return paths
+
+
+def init_worker(adjacency, edge_routers):
+    """
+    Function for initialize worker process with shared adjacency.
+    """
+    global _adjacency, _edge_routers
+    _adjacency, _edge_routers = adjacency, edge_routers
+
+
+def source_paths(source):
+    """
+    Function for compute paths from one source (executed in worker process).
+    :param source: source router
+    :return: tuple (source, paths)
+    """
+    return source, shortest_paths(_adjacency, _edge_routers, source)
+
+
+def routing_table(graph, workers=None):
+    """
+    Function for compute cost/hop table of all pairs of routers (Dijkstra from each router).
+    Sources are distributed among processes of pool.
+    :param graph: graph of topology
+    :param workers: number of worker processes (default number of CPUs, 1 = without pool)
+    :return: dict source -> target -> {'cost': ..., 'hops': ..., 'next_hop': ...}
+    """
+    adjacency, edge_routers = routing_graph(graph)
+    workers = workers or multiprocessing.cpu_count()
+
+    if workers == 1 or len(adjacency) < POOL_THRESHOLD:
+        return dict((source, shortest_paths(adjacency, edge_routers, source)) for source in adjacency)
+
+    pool = multiprocessing.Pool(workers, init_worker, (adjacency, edge_routers))
+    try:
+        return dict(pool.imap_unordered(source_paths, adjacency, max(1, len(adjacency) // (workers * 4))))
+    finally:
+        pool.close()
+        pool.join()
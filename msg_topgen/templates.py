@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+class FrozenDict(dict):
+    """
+    Class representing immutable dict shared by configs of many routers.
+    Shared component is never changed in place, change its copy (dict(component) or component.copy()).
+    """
+    __slots__ = ()
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Shared component can't be changed, change its copy (dict(component)).")
+
+    __setitem__ = __delitem__ = __ior__ = clear = pop = popitem = setdefault = update = _readonly
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return FrozenDict, (dict(self),)
+
+
+# Shared default listeners (role, port) -> listener
+_listeners = {}
+
+
+def listener_template(role, port):
+    """
+    Function for get shared default listener (same listener of routers is the same object).
+    :param role: role of listener
+    :param port: port of listener (string)
+    :return: listener variables in json (immutable)
+    """
+    key = (role, port)
+    listener = _listeners.get(key)
+    if listener is None:
+        listener = _listeners[key] = FrozenDict({
+            'host': '0.0.0.0',
+            'port': port,
+            'role': role,
+            'authenticatePeer': 'no',
+            'saslMechanisms': 'ANONYMOUS'
+        })
+    return listener
+
@@ -1,10 +1,135 @@
+import collections
+import hashlib
 import itertools
+import json
+import math
 import networkx as nx
+import numpy as np
+import os
+import random
 import sys
+import tempfile
 import yaml
-import matplotlib.pyplot as plt
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+try:
+    from itertools import izip
+except ImportError:
+    # Python 3
+    izip = zip
 
 from networkx.readwrite import json_graph
+from networkx.utils import make_str
+
+from compact import CompactGraph
+from generators import generator_names, get_generator
+
+# libyaml based loader is much faster than pure-Python one
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+def construct_event_object(events, event, loader):
+    """
+    Function for construct python object from YAML events (sub-tree starting by given event).
+    :param events: iterator of following YAML events
+    :param event: first event of object
+    :param loader: instance of YAML loader used for resolving and constructing scalars
+    :return: constructed object
+    """
+    if isinstance(event, yaml.ScalarEvent):
+        tag = event.tag
+        if tag is None or tag == '!':
+            tag = loader.resolve(yaml.ScalarNode, event.value, event.implicit)
+        node = yaml.ScalarNode(tag, event.value, style=event.style)
+        # scalar constructors are called directly, construct_object would keep reference to every node
+        constructor = loader.yaml_constructors.get(tag, loader.yaml_constructors[None])
+        return constructor(loader, node)
+
+    if isinstance(event, yaml.MappingStartEvent):
+        mapping = {}
+        event = next(events)
+        while not isinstance(event, yaml.MappingEndEvent):
+            key = construct_event_object(events, event, loader)
+            mapping[key] = construct_event_object(events, next(events), loader)
+            event = next(events)
+        return mapping
+
+    if isinstance(event, yaml.SequenceStartEvent):
+        sequence = []
+        event = next(events)
+        while not isinstance(event, yaml.SequenceEndEvent):
+            sequence.append(construct_event_object(events, event, loader))
+            event = next(events)
+        return sequence
+
+    raise ValueError("Unsupported YAML event {} (aliases and anchors aren't supported)".format(event))
+
+
+def scan_graph_type(filename):
+    """
+    Function for read type of graph (top-level keys directed and multigraph) from graph file.
+    File is only parsed (nodes and links aren't constructed), so type is known before the first node
+    is added, whatever order of keys is (yaml.dump writes multigraph behind links).
+    :param filename: path to file with graph data
+    :return: tuple (directed, multigraph)
+    """
+    loader = yaml.SafeLoader('')
+    flags = {}
+    depth = 0
+    key = None
+
+    with open(filename, 'r') as stream:
+        for event in yaml.parse(stream, Loader=YAML_LOADER):
+            if isinstance(event, (yaml.MappingStartEvent, yaml.SequenceStartEvent)):
+                depth += 1
+                # collection is value of top-level key
+                if depth == 2:
+                    key = None
+            elif isinstance(event, (yaml.MappingEndEvent, yaml.SequenceEndEvent)):
+                depth -= 1
+            elif depth == 1 and isinstance(event, yaml.ScalarEvent):
+                if key is None:
+                    key = construct_event_object(None, event, loader)
+                else:
+                    if key in ('directed', 'multigraph'):
+                        flags[key] = construct_event_object(None, event, loader)
+                        if len(flags) == 2:
+                            break
+                    key = None
+
+    return bool(flags.get('directed')), bool(flags.get('multigraph'))
+
+
+def fill_complete_adjacency(graph, data):
+    """
+    Function for add all edges of complete graph into empty undirected networkx graph.
+    Adjacency dicts are filled directly, add_edges_from checks and updates data of each edge one by one
+    (2.2x slower for 2,000 routers).
+    :param graph: networkx Graph with nodes and without edges
+    :param data: attributes of each edge (every edge gets own copy)
+    """
+    adjacency = graph._adj
+    nodes = list(adjacency)
+
+    for idx, node in enumerate(nodes):
+        others = nodes[idx + 1:]
+        edges = [dict(data) for _ in others]
+        adjacency[node].update(izip(others, edges))
+        for out, edge in izip(others, edges):
+            adjacency[out][node] = edge
+
+
+def as_node(value):
+    """
+    Function for convert node ID from node-link data (lists are converted to hashable tuples).
+    :param value: node ID
+    :return: node
+    """
+    return tuple(value) if isinstance(value, list) else value
 
 
 class Topology:
@@ -16,19 +141,57 @@ class Topology:
     ERR_GRAPH_FORMAT = 99
     ERR_OPEN_FILE = 98
     ERR_CREATE_GRAPH = 97
-
-    def __init__(self):
+    # Bigger graphs are drawn by cheap deterministic layout and without labels
+    LAYOUT_THRESHOLD = 200
+    # Seed for reproducible positions of nodes
+    LAYOUT_SEED = 42
+    # Graph classes by name of backend
+    BACKENDS = {'networkx': nx.Graph, 'compact': CompactGraph}
+
+    def __init__(self, cache_dir=None, backend='networkx'):
+        """
+        :param cache_dir: path to dir with cache of parsed graph files (None = without cache)
+        :param backend: graph backend, 'networkx' or 'compact' (CompactGraph, for huge topologies)
+        """
         self.graph = None
+        self.cache_dir = cache_dir
+        self.backend = backend
+
+    def new_graph(self):
+        """
+        Method for create empty graph of selected backend.
+        :return: empty graph
+        """
+        return self.BACKENDS[self.backend]()
+
+    def networkx_graph(self):
+        """
+        Method for get topology as networkx graph (compact graph is converted, e.g. for drawing).
+        :return: networkx graph
+        """
+        if isinstance(self.graph, CompactGraph):
+            return self.graph.to_networkx()
+        return self.graph
 
-    def load_graph_from_json(self, filename):
+    def load_graph_from_json(self, filename, streaming=False):
         """
         Method for load graph data from file.
         :param filename: path to file with graph data
+        :param streaming: flag for build graph directly from parsed events (see stream_graph_file)
         """
+        if streaming:
+            if not os.path.isfile(filename):
+                sys.stdout.write("File {} doesn't exists.\n".format(filename))
+                sys.exit(self.ERR_OPEN_FILE)
+            try:
+                self.graph = self.stream_graph_file(filename, self.new_graph())
+            except Exception as exc:
+                sys.stdout.write("Exception: {}\nLoaded file isn't contain valid graph.\n".format(exc))
+                sys.exit(self.ERR_GRAPH_FORMAT)
+            return
 
         try:
-            with open(filename, 'r') as stream:
-                graph_json = yaml.load(stream)
+            graph_json = self.load_graph_data(filename)
         except Exception as exc:
             sys.stdout.write("Exception: {}\nFile {} doesn't exists.\n".format(exc, filename))
             # raise Exception
@@ -36,11 +199,141 @@ class Topology:
 
         try:
             self.graph = json_graph.node_link_graph(graph_json)
+            if self.backend == 'compact':
+                if self.graph.is_directed() or self.graph.is_multigraph():
+                    raise ValueError("Compact backend supports only undirected graphs")
+                self.graph = CompactGraph.from_networkx(self.graph)
         except Exception as exc:
             sys.stdout.write("Exception: {}\nLoaded file isn't contain valid graph.\n".format(exc))
             # raise Exception
             sys.exit(self.ERR_GRAPH_FORMAT)
 
+    def load_graph_data(self, filename):
+        """
+        Method for load node-link data from graph file, through on-disk cache when cache dir is set.
+        Cached data are valid only for same path, size, mtime and content hash of file.
+        :param filename: path to file with graph data
+        :return: parsed node-link data
+        """
+        if not self.cache_dir:
+            return self.parse_graph_file(filename)
+
+        with open(filename, 'rb') as stream:
+            content = stream.read()
+        stat = os.stat(filename)
+        path = os.path.abspath(filename)
+        key = (path, stat.st_size, stat.st_mtime, hashlib.sha1(content).hexdigest())
+        cache_file = os.path.join(self.cache_dir, hashlib.sha1(path.encode('utf-8')).hexdigest() + '.pickle')
+
+        try:
+            with open(cache_file, 'rb') as stream:
+                cached_key, graph_json = pickle.load(stream)
+            if cached_key == key:
+                return graph_json
+        except Exception:
+            # missing, outdated or damaged cache
+            pass
+
+        graph_json = self.parse_graph_content(content)
+
+        try:
+            if not os.path.isdir(self.cache_dir):
+                os.makedirs(self.cache_dir)
+            # write into temporary file and rename it, concurrent runs never read partial cache
+            handle, tmp_file = tempfile.mkstemp(dir=self.cache_dir)
+            with os.fdopen(handle, 'wb') as stream:
+                pickle.dump((key, graph_json), stream, pickle.HIGHEST_PROTOCOL)
+            os.rename(tmp_file, cache_file)
+        except (IOError, OSError) as exc:
+            sys.stderr.write("Cannot write cache of graph file {}: {}\n".format(filename, exc))
+
+        return graph_json
+
+    @staticmethod
+    def stream_graph_file(filename, graph=None):
+        """
+        Method for load graph file (node-link format in YAML or JSON) event by event.
+        Items of 'nodes' and 'links' are added into graph as soon as they are parsed, so whole document
+        is never held in memory next to the graph.
+        :param filename: path to file with graph data
+        :param graph: empty graph to fill (default networkx graph), directed graph or multigraph is filled
+                      into new networkx graph of that type, compact graph can't be directed/multigraph
+        :return: graph
+        """
+        loader = yaml.SafeLoader('')
+        graph = nx.Graph() if graph is None else graph
+        counter = itertools.count()
+
+        # type of graph has to be known before the first link is added, keys can follow links
+        directed, multigraph = scan_graph_type(filename)
+        if (directed or multigraph) and isinstance(graph, CompactGraph):
+            raise ValueError("Compact backend supports only undirected graphs")
+        if multigraph:
+            graph = nx.MultiDiGraph() if directed else nx.MultiGraph()
+        elif directed:
+            graph = nx.DiGraph()
+
+        with open(filename, 'r') as stream:
+            events = yaml.parse(stream, Loader=YAML_LOADER)
+            while not isinstance(next(events), yaml.MappingStartEvent):
+                pass
+
+            event = next(events)
+            while not isinstance(event, yaml.MappingEndEvent):
+                key = construct_event_object(events, event, loader)
+                event = next(events)
+
+                if key in ('nodes', 'links') and isinstance(event, yaml.SequenceStartEvent):
+                    event = next(events)
+                    while not isinstance(event, yaml.SequenceEndEvent):
+                        item = construct_event_object(events, event, loader)
+                        if key == 'nodes':
+                            node = as_node(item.pop('id', next(counter)))
+                            graph.add_node(node, **dict((make_str(k), v) for k, v in item.items()))
+                        else:
+                            source, target = as_node(item.pop('source')), as_node(item.pop('target'))
+                            if graph.is_multigraph():
+                                graph.add_edge(source, target, item.pop('key', None),
+                                               **dict((make_str(k), v) for k, v in item.items()))
+                            else:
+                                graph.add_edge(source, target, **dict((make_str(k), v) for k, v in item.items()))
+                        event = next(events)
+                else:
+                    value = construct_event_object(events, event, loader)
+                    if key == 'graph':
+                        graph.graph = value
+
+                event = next(events)
+
+        return graph
+
+    @staticmethod
+    def parse_graph_file(filename):
+        """
+        Method for parse graph file in JSON or YAML format.
+        :param filename: path to file with graph data
+        :return: parsed node-link data
+        """
+        with open(filename, 'r') as stream:
+            return Topology.parse_graph_content(stream.read())
+
+    @staticmethod
+    def parse_graph_content(content):
+        """
+        Method for parse content of graph file in JSON or YAML format.
+        JSON is parsed by json module (C parser), YAML by libyaml loader when it's available.
+        :param content: content of graph file
+        :return: parsed node-link data
+        """
+        if content.lstrip()[:1] in ('{', '[', b'{', b'['):
+            try:
+                return json.loads(content)
+            except ValueError:
+                # YAML in flow style
+                pass
+
+        return yaml.load(content, Loader=YAML_LOADER)
+
     def export_graph(self, path, title, graph_type):
         """
         Method for export networkx graph into svg file.
@@ -48,54 +341,166 @@ class Topology:
         :param path: Path to output file
         :param graph_type: Graph type
         """
+        # Drawing stack is imported only when picture is requested, it's the slowest import of whole package.
+        # Each export has own figure and canvas (no pyplot global state), so repeated exports don't accumulate
+        from matplotlib.backends.backend_svg import FigureCanvasSVG
+        from matplotlib.figure import Figure
+
+        # drawing works only with networkx graph
+        graph = self.networkx_graph()
+        large = graph.number_of_nodes() > self.LAYOUT_THRESHOLD
 
         color_map = []
-        for n in self.graph.nodes():
-            if self.graph.node[n]['type'] == 'router':
+        for n in graph.nodes():
+            if graph.node[n]['type'] == 'router':
                 color_map.append('yellow')
             else:
                 color_map.append('#BBF94B')
 
-        if graph_type == 'complete_graph':
-            pos = nx.shell_layout(self.graph)
-        else:
-            pos = nx.spring_layout(self.graph)
+        pos = self.get_layout(graph_type, graph)
 
-        plt.figure(1, figsize=(14, 14))
+        if large:
+            # Grow picture with graph, but keep it in reasonable size
+            scale = math.sqrt(float(graph.number_of_nodes()) / self.LAYOUT_THRESHOLD)
+            figure = Figure(figsize=(min(14 * scale, 60), min(14 * scale, 60)))
+            node_size = max(10, 2500 / scale ** 2)
+        else:
+            figure = Figure(figsize=(14, 14))
+            node_size = 2500
+        FigureCanvasSVG(figure)
+        ax = figure.add_subplot(111)
         # nodes
-        nx.draw_networkx(self.graph, pos=pos, node_size=2500, node_color=color_map, font_size=12)
+        nx.draw_networkx_nodes(graph, pos, node_size=node_size, node_color=color_map, ax=ax)
         # edges
-        nx.draw_networkx_edges(self.graph, pos=pos, edge_color='black')
-        edge_labels = nx.get_edge_attributes(self.graph, 'value')
-        nx.draw_networkx_edge_labels(self.graph, pos, edge_labels, font_size=14)
+        nx.draw_networkx_edges(graph, pos=pos, edge_color='black', ax=ax)
+        # labels are unreadable (and slow to draw) for big graphs
+        if not large:
+            nx.draw_networkx_labels(graph, pos, font_size=12, ax=ax)
+            edge_labels = nx.get_edge_attributes(graph, 'value')
+            nx.draw_networkx_edge_labels(graph, pos, edge_labels, font_size=14, ax=ax)
+
+        ax.axis('off')
+        ax.set_title(title)
+        figure.savefig(path, format='svg')
+        # release artists right after save
+        figure.clear()
+
+    def get_layout(self, graph_type, graph=None):
+        """
+        Method for select layout of graph according to graph type and size.
+        Positions are reproducible, same graph is always drawn same way.
+        :param graph_type: Graph type
+        :param graph: networkx graph (default graph of topology)
+        :return: dict with positions of nodes
+        """
+        graph = self.graph if graph is None else graph
+        if graph_type == 'complete_graph':
+            return nx.shell_layout(graph)
+
+        if graph.number_of_nodes() > self.LAYOUT_THRESHOLD:
+            return self.role_layout(graph)
 
-        plt.axis('off')
-        plt.title(title)
-        plt.savefig(path, format='svg')
-        # plt.show()  # TODO remove show, it's just for debug
+        # spring_layout is quadratic per iteration, it's used only for small graphs
+        rand = random.Random(self.LAYOUT_SEED)
+        initial = dict((n, (rand.random(), rand.random())) for n in graph.nodes())
+        return nx.spring_layout(graph, pos=initial)
+
+    def role_layout(self, graph=None):
+        """
+        Method for create hierarchical layout by role in linear time.
+        Routers are placed in grid above brokers, nodes are ordered by breadth-first search,
+        so neighbors are close to each other.
+        :param graph: graph (default graph of topology)
+        :return: dict with positions of nodes
+        """
+        graph = self.graph if graph is None else graph
+        order = []
+        visited = set()
+        for start in graph.nodes():
+            if start in visited:
+                continue
+            visited.add(start)
+            queue = collections.deque([start])
+            while queue:
+                node = queue.popleft()
+                order.append(node)
+                for neighbor in graph[node]:
+                    if neighbor not in visited:
+                        visited.add(neighbor)
+                        queue.append(neighbor)
+
+        routers = [n for n in order if graph.node[n]['type'] == 'router']
+        brokers = [n for n in order if graph.node[n]['type'] != 'router']
+        columns = max(1, int(math.ceil(math.sqrt(len(order)))))
+
+        pos = {}
+        for idx, node in enumerate(routers):
+            pos[node] = (float(idx % columns) / columns, -float(idx // columns) / columns)
+        # one empty row between routers and brokers
+        offset = int(math.ceil(float(len(routers)) / columns)) + 1
+        for idx, node in enumerate(brokers):
+            pos[node] = (float(idx % columns) / columns, -float(idx // columns + offset) / columns)
+
+        return pos
 
     def create_graph(self, routers, brokers, graph_type):
         """
-        Method for create new graph only from nodes names and graph type (complete, bus, line, line-mixed)
+        Method for create new graph only from nodes names and graph type (complete, bus, line, line-mixed,
+        hub-spoke, tree, two-tier, random regular or generator from plugin, see generators.py)
         :param routers: List of routers ID
         :param brokers: List of brokers ID
         :param graph_type: Type of graph
         :return:
         """
         sys.stderr.write("Graph_type: " + str(graph_type)+"\n")  # @TODO remove this
-        self.graph = nx.Graph()
+        generator = get_generator(graph_type)
+        if generator is None:
+            sys.stdout.write(
+                "No generator for create '{}' graph!\nUse one of: {} in config file as graph type.\n".format(
+                    graph_type, ", ".join("'{}'".format(name) for name in generator_names())))
+            sys.exit(self.ERR_CREATE_GRAPH)
+
+        self.graph = self.new_graph()
 
         self.graph.add_nodes_from(routers, type='router')
         self.graph.add_nodes_from(brokers, type='broker')
 
-        try:
-            getattr(self, graph_type)(self.graph, routers, brokers)
-        except AttributeError:
-            sys.stdout.write(
-                "No method for create '{}' in class Topology!\nUse: 'bus_graph', 'line_graph', 'line_mix_graph', "
-                "'complete_graph' or 'cycle_graph' in config file as graph type.\n".format(
-                    graph_type))
-            sys.exit(self.ERR_CREATE_GRAPH)
+        # counted before building, some generators consume lists of nodes
+        expected = generator.edge_count(len(routers), len(brokers))
+        generator.build(self, self.graph, routers, brokers)
+
+        if self.graph.number_of_edges() != expected:
+            sys.stderr.write("Generator of '{}' graph created {} edges instead of declared {}.\n".format(
+                graph_type, self.graph.number_of_edges(), expected))
+
+    def assign_hosts(self, hosts):
+        """
+        Method for pack instances onto shared hosts (node attribute host), ports of packed instances
+        are allocated per host (see generate.pack_hosts).
+        :param hosts: dict host -> list of instances (routers and brokers) running on it
+        """
+        for host, instances in hosts.items():
+            for instance in instances or []:
+                if instance in self.graph:
+                    self.graph.add_node(instance, host=host)
+                else:
+                    sys.stderr.write("Instance '{}' of host '{}' is not in topology.\n".format(instance, host))
+
+    def add_edges(self, graph, nodes, sources, targets):
+        """
+        Method for add edges given by indexes of nodes into graph, cost is attached in the same pass.
+        :param graph: Graph
+        :param nodes: List of nodes ID, indexes in sources and targets point into this list
+        :param sources: list (or numpy array) of indexes of source nodes
+        :param targets: list (or numpy array) of indexes of target nodes
+        """
+        if isinstance(graph, CompactGraph):
+            # compact backend adds edges in bulk by numpy arrays of node IDs
+            ids = np.array([graph.index[node] for node in nodes], dtype=np.intc)
+            graph.add_edges_from_arrays(ids[np.asarray(sources, dtype=int)], ids[np.asarray(targets, dtype=int)],
+                                        self.DEFAULT_COST)
+        else:
+            graph.add_edges_from(((nodes[x], nodes[y]) for x, y in izip(sources, targets)), value=self.DEFAULT_COST)
 
     def complete_graph(self, graph, *_):
         """
@@ -103,12 +508,19 @@ class Topology:
         :param graph: Graph
         :param _: unused parameters (called by getattr())
         """
-        if graph.is_directed():
-            edges = itertools.permutations(self.graph.nodes(), 2)       # For future using
+        if isinstance(graph, CompactGraph):
+            nodes = list(graph.nodes())
+            if graph.is_directed():
+                sources, targets = np.nonzero(~np.eye(len(nodes), dtype=bool))     # For future using
+            else:
+                sources, targets = np.triu_indices(len(nodes), 1)
+            self.add_edges(graph, nodes, sources, targets)
+        elif graph.is_directed():
+            graph.add_edges_from(itertools.permutations(graph.nodes(), 2), value=self.DEFAULT_COST)  # For future using
+        elif graph.is_multigraph() or graph.number_of_edges():
+            graph.add_edges_from(itertools.combinations(graph.nodes(), 2), value=self.DEFAULT_COST)
         else:
-            edges = itertools.combinations(self.graph.nodes(), 2)
-
-        graph.add_edges_from(edges, value=self.DEFAULT_COST)
+            fill_complete_adjacency(graph, {'value': self.DEFAULT_COST})
 
         self.graph = graph
 
@@ -119,23 +531,21 @@ class Topology:
         :param routers: List of routers ID
         :param brokers: List of brokers ID
         """
-        start_idx = 0
+        nodes = list(routers) + list(brokers)
         last_b = len(brokers)
         last_r = len(routers) - 1
-
-        for x in range(start_idx, last_r):
-            graph.add_edge(routers[x], routers[x + 1])
-
-        for x in range(start_idx, last_b / 2 - 1):
-            graph.add_edge(brokers[x], brokers[x + 1])
-
-        for x in range(last_b - 1, last_b / 2, -1):
-            graph.add_edge(brokers[x], brokers[x - 1])
+        # indexes of brokers start behind routers
+        first_b = len(routers)
+        left = [first_b + x for x in range(last_b // 2 - 1)]
+        right = [first_b + x for x in range(last_b - 1, last_b // 2, -1)]
+        sources = list(range(last_r)) + left + right
+        targets = list(range(1, last_r + 1)) + [x + 1 for x in left] + [x - 1 for x in right]
 
         if brokers and routers:
-            graph.add_edge(brokers[start_idx], routers[start_idx])
-            graph.add_edge(brokers[last_b - 1], routers[last_r])
-        nx.set_edge_attributes(graph, 'value', self.DEFAULT_COST)
+            sources += [first_b, first_b + last_b - 1]
+            targets += [0, last_r]
+
+        self.add_edges(graph, nodes, sources, targets)
 
         self.graph = graph
 
@@ -168,13 +578,14 @@ class Topology:
                 else:
                     nodes.append(routers.pop())
 
-        for x in range(0, len(nodes) - 1):
-            graph.add_edge(nodes[x], nodes[x + 1])
+        sources = list(range(len(nodes) - 1))
+        targets = list(range(1, len(nodes)))
 
         if complete:
-            graph.add_edge(nodes[0], nodes[len(nodes) - 1])
+            sources.append(0)
+            targets.append(len(nodes) - 1)
 
-        nx.set_edge_attributes(graph, 'value', self.DEFAULT_COST)
+        self.add_edges(graph, nodes, sources, targets)
 
         self.graph = graph
 
@@ -194,24 +605,16 @@ class Topology:
         :param routers: List of routers ID
         :param brokers: List of brokers ID
         """
-        start_idx = 0
-        y = 0
-        last_b = len(brokers) - 1
-        last_r = len(routers) - 1
+        nodes = list(routers) + list(brokers)
+        sources = list(range(len(routers) - 1))
+        targets = list(range(1, len(routers)))
 
-        for x in range(start_idx, last_r):
-            graph.add_edge(routers[x], routers[x + 1])
-
-        for x in range(start_idx, len(brokers)):
-            if last_b <= last_r:
-                graph.add_edge(brokers[x], routers[x])
-            else:
-                # @TODO - update looping over routers with brokers-edge (loop 0-n, multiple: brokers/router)
-                if y > last_r:
-                    y = 0
-                graph.add_edge(brokers[x], routers[y])
-                y += 1
+        if routers:
+            # @TODO - update looping over routers with brokers-edge (loop 0-n, multiple: brokers/router)
+            # more brokers than routers are connected to routers in loop
+            sources += [len(routers) + x for x in range(len(brokers))]
+            targets += [x % len(routers) for x in range(len(brokers))]
 
-        nx.set_edge_attributes(graph, 'value', self.DEFAULT_COST)
+        self.add_edges(graph, nodes, sources, targets)
 
         self.graph = graph
@@ -10,7 +10,8 @@ setup(
     version='0.1.14',
     packages=['msg_topgen'],
     entry_points={
-        "console_scripts": ['msg_topgen = msg_topgen.msg_topgen:main']
+        "console_scripts": ['msg_topgen = msg_topgen.msg_topgen:main',
+                            'msg_topgen_batch = msg_topgen.batch:main']
     },
     license='Apache 2.0',
     description='',
@@ -25,6 +26,7 @@ setup(
         'ansible>=2.3.2.0',
         'libracmp',
         'matplotlib',
+        'numpy',
         'argparse'
     ],
     url='https://github.com/rh-messaging-qe/qpid_generator',
@@ -0,0 +1,75 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from nose.tools import assert_equals
+
+from msg_topgen.batch import expand_manifest, run_batch
+
+
+class ExpandManifestTest(unittest.TestCase):
+    def test_expand_configs(self):
+        items = expand_manifest({'configs': ['config1.yml', 'config2.yml']})
+        assert_equals([{'config_file': 'config1.yml'}, {'config_file': 'config2.yml'}], items)
+
+    def test_expand_matrix(self):
+        items = expand_manifest({'matrix': {'graph_type': ['line_graph', 'bus_graph'], 'routers': [1, 2],
+                                            'brokers': 1}})
+
+        assert_equals(4, len(items))
+        assert_equals({'graph_type': 'line_graph', 'routers': 1, 'brokers': 1}, items[0])
+        assert_equals({'graph_type': 'bus_graph', 'routers': 2, 'brokers': 1}, items[3])
+
+    def test_expand_duplicate_matrix(self):
+        items = expand_manifest({'matrix': {'graph_type': ['line_graph', 'line_graph'], 'routers': 2}})
+
+        assert_equals([{'graph_type': 'line_graph', 'routers': 2, 'brokers': 0}], items)
+
+    def test_expand_empty(self):
+        assert_equals([], expand_manifest({}))
+
+
+class RunBatchTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_run_batch(self):
+        items = expand_manifest({'configs': ['config.yml'],
+                                 'matrix': {'graph_type': ['line_graph', 'none_exists'], 'routers': [2, 3],
+                                            'brokers': [1]}})
+        results = list(run_batch(items, self.directory, workers=2, no_image=True))
+
+        assert_equals(items, [result['item'] for result in results])
+        assert_equals(['ok', 'ok', 'ok', 'failed', 'failed'], [result['status'] for result in results])
+        assert_equals('Exited with code 97', results[3]['error'])
+        assert_equals(True, all('total' in result['times'] for result in results))
+
+        for name in ['config/user_defined_R2_B0', 'line_graph_R2_B1', 'line_graph_R3_B1']:
+            assert_equals(True, os.path.isfile(os.path.join(self.directory, name, 'router_confs.json')))
+
+    def test_graph_files_with_same_inventory(self):
+        graph_file = os.path.join(self.directory, 'graph.yml')
+        with open(graph_file, 'w') as stream:
+            stream.write("nodes:\n- {id: router1, type: router}\n- {id: router2, type: router}\n"
+                         "links:\n- {source: router1, target: router2}\n")
+        configs = []
+        for name, graph_file in [('first', 'configs/ref_graph_file.yml'), ('second', graph_file)]:
+            os.makedirs(os.path.join(self.directory, name))
+            configs.append(os.path.join(self.directory, name, 'config.yml'))
+            with open(configs[-1], 'w') as stream:
+                stream.write("hostfile: configs/inventory\ngraph_file: %s\n" % graph_file)
+        out_dir = os.path.join(self.directory, 'out')
+        results = list(run_batch(expand_manifest({'configs': configs}), out_dir, workers=2, no_image=True))
+
+        assert_equals(['ok', 'ok'], [result['status'] for result in results])
+        confs = []
+        for name in ['config_0', 'config_1']:
+            with open(os.path.join(out_dir, name, 'user_defined_R2_B0', 'router_confs.json')) as stream:
+                confs.append(json.load(stream))
+        # each graph file has own output
+        assert confs[0] != confs[1]
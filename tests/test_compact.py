@@ -0,0 +1,105 @@
+import json
+import unittest
+
+import networkx as nx
+from nose.tools import assert_equals, raises
+
+from msg_topgen.compact import CompactGraph
+from msg_topgen.generate import get_conf
+from msg_topgen.topology import Topology
+
+
+def normalize(confs):
+    """
+    Function for compare configs independently on order of neighbors.
+    """
+    return dict((node, dict((key, sorted(json.dumps(item, sort_keys=True) for item in value)
+                             if isinstance(value, list) else value) for key, value in conf.items()))
+                for node, conf in confs.items())
+
+
+class CompactGraphTest(unittest.TestCase):
+    def setUp(self):
+        self.graph = CompactGraph()
+        self.graph.add_nodes_from(['router1', 'router2'], type='router')
+        self.graph.add_node('broker1', type='broker', queue='q1')
+        self.graph.add_edge('router1', 'router2', value=10)
+        self.graph.add_edges_from([('router2', 'broker1')], value=5)
+
+    def test_nodes(self):
+        assert_equals(['router1', 'router2', 'broker1'], list(self.graph.nodes()))
+        assert_equals({'type': 'broker', 'queue': 'q1'}, self.graph.node['broker1'])
+        assert_equals({'type': 'router'}, self.graph.nodes(data=True)['router1'])
+        assert_equals(3, self.graph.number_of_nodes())
+
+    def test_update_node(self):
+        self.graph.add_node('router1', listener=[{'port': 5672}])
+
+        assert_equals({'type': 'router', 'listener': [{'port': 5672}]}, self.graph.node['router1'])
+        assert_equals(3, len(self.graph))
+
+    def test_adjacency(self):
+        adjacency = dict((node, dict(nbrdict.items())) for node, nbrdict in self.graph.adjacency())
+
+        assert_equals({'router1': {'router2': {'value': 10}},
+                       'router2': {'router1': {'value': 10}, 'broker1': {'value': 5}},
+                       'broker1': {'router2': {'value': 5}}}, adjacency)
+        assert_equals(['router1', 'broker1'], self.graph['router2'].keys())
+        assert_equals({'value': 5}, self.graph['broker1']['router2'])
+
+    def test_duplicate_edges(self):
+        self.graph.add_edge('router2', 'router1', value=3)
+        self.graph.add_edge('router1', 'broker1')
+
+        assert_equals(3, self.graph.number_of_edges())
+        assert_equals({'value': 3}, self.graph['router1']['router2'])
+        assert_equals({}, self.graph['broker1']['router1'])
+
+    def test_to_networkx(self):
+        graph = self.graph.to_networkx()
+
+        assert_equals(dict(self.graph.nodes(data=True)), dict(graph.nodes(data=True)))
+        assert_equals({'value': 10}, graph['router1']['router2'])
+        assert_equals(2, graph.number_of_edges())
+
+    @raises(KeyError)
+    def test_missing_edge(self):
+        self.graph['router1']['broker1']
+
+
+class CompactTopologyTest(unittest.TestCase):
+    def create(self, backend, graph_type):
+        topology = Topology(backend=backend)
+        topology.create_graph(['router%d' % x for x in range(6)], ['broker%d' % x for x in range(3)], graph_type)
+        return topology.graph
+
+    def test_create_graph(self):
+        for graph_type in ['bus_graph', 'line_graph', 'line_mix_graph', 'complete_graph', 'cycle_graph']:
+            graph = self.create('compact', graph_type)
+            reference = self.create('networkx', graph_type)
+
+            assert isinstance(graph, CompactGraph)
+            assert_equals(sorted(map(sorted, reference.edges())), sorted(map(sorted, graph.edges())))
+
+    def test_get_conf(self):
+        for graph_type in ['bus_graph', 'line_graph', 'complete_graph']:
+            assert_equals(normalize(get_conf(self.create('networkx', graph_type))),
+                          normalize(get_conf(self.create('compact', graph_type))))
+
+    def test_load_graph(self):
+        topology = Topology(backend='compact')
+        topology.load_graph_from_json('tests/items/graph_test.yml')
+        reference = Topology()
+        reference.load_graph_from_json('tests/items/graph_test.yml')
+
+        assert isinstance(topology.graph, CompactGraph)
+        assert_equals(normalize(get_conf(reference.graph)), normalize(get_conf(topology.graph)))
+
+    def test_networkx_graph(self):
+        topology = Topology(backend='compact')
+        topology.create_graph(['router1', 'router2'], ['broker1'], 'bus_graph')
+        graph = topology.networkx_graph()
+
+        assert isinstance(graph, nx.Graph)
+        assert_equals(3, graph.number_of_nodes())
+        assert_equals(2, graph.number_of_edges())
@@ -2,8 +2,41 @@ from libracmp import Comparator
 from nose.tools import *
 import unittest
 import sys
+import copy
+from multiprocessing.pool import ThreadPool
 
+try:
+    from StringIO import StringIO
+except ImportError:
+    # Python 3
+    from io import StringIO
+
+from msg_topgen import generate
 from msg_topgen.generate import *
+from msg_topgen.ports import PortAllocator
+
+
+class IndexNodeAttributes(unittest.TestCase):
+    @classmethod
+    def setup_class(cls):
+        cls.graph = nx.Graph()
+
+        cls.graph.add_node('router1', type='router', listener=[{'host': '1.1.1.1', 'port': '666'}], def_list='no')
+        cls.graph.add_node('router2', type='router', group='group2')
+        cls.graph.add_node('broker1', type='broker')
+
+    def test_index_node_attributes_1(self):
+        index = index_node_attributes(self.graph)
+
+        assert_equals({'router1': 'router', 'router2': 'router', 'broker1': 'broker'}, index['type'])
+        assert_equals({'router1': [{'host': '1.1.1.1', 'port': '666'}]}, index['listener'])
+        assert_equals({'router1': 'no'}, index['def_list'])
+        assert_equals({}, index['connector'])
+
+    def test_index_node_attributes_2(self):
+        index = index_node_attributes(self.graph, ('group',))
+
+        assert_equals({'group': {'router2': 'group2'}}, index)
 
 
 class GenerateRouterInfo(unittest.TestCase):
@@ -211,13 +244,15 @@ class GenerateConnectors(unittest.TestCase):
                 'name': 'router1',
                 'host': 'router1',
                 'port': '5672',
-                'role': 'inter-router'
+                'role': 'inter-router',
+                'cost': 10
             },
             {
                 'name': 'router3',
                 'host': 'router3',
                 'port': '5672',
-                'role': 'inter-router'
+                'role': 'inter-router',
+                'cost': 5
             }
         ]
 
@@ -242,13 +277,15 @@ class GenerateConnectors(unittest.TestCase):
                 'name': 'router1',
                 'host': 'router1',
                 'port': '5672',
-                'role': 'inter-router'
+                'role': 'inter-router',
+                'cost': 5
             },
             {
                 'name': 'router2',
                 'host': 'router2',
                 'port': '5672',
-                'role': 'inter-router'
+                'role': 'inter-router',
+                'cost': 10
             }
         ]
 
@@ -283,13 +320,15 @@ class GenerateConnectors(unittest.TestCase):
                 'name': 'router4',
                 'host': 'router4',
                 'port': '5675',
-                'role': 'inter-router'
+                'role': 'inter-router',
+                'cost': 10
             },
             {
                 'name': 'router3',
                 'host': 'router3',
                 'port': '5672',
-                'role': 'inter-router'
+                'role': 'inter-router',
+                'cost': 5
             }
         ]
 
@@ -310,13 +349,15 @@ class GenerateConnectors(unittest.TestCase):
                 'name': 'router1',
                 'host': 'router1',
                 'port': '5672',
-                'role': 'inter-router'
+                'role': 'inter-router',
+                'cost': 10
             },
             {
                 'name': 'router3',
                 'host': 'router3',
                 'port': '5672',
-                'role': 'inter-router'
+                'role': 'inter-router',
+                'cost': 5
             },
             {
                 'name': 'broker1',
@@ -486,6 +527,50 @@ class GenerateAddresses(unittest.TestCase):
         assert_equals(address, generated)
 
 
+class Deduplication(unittest.TestCase):
+    def setUp(self):
+        self.stderr = sys.stderr
+        sys.stderr = StringIO()
+
+    def tearDown(self):
+        sys.stderr = self.stderr
+
+    def test_addresses(self):
+        graph = nx.Graph()
+        graph.add_node('router1', type='router', address=[{'prefix': 'a', 'distribution': 'closest'},
+                                                           {'prefix': 'closest', 'distribution': 'closest',
+                                                            'waypoint': 'yes'},
+                                                           {'prefix': 'a', 'distribution': 'closest'}])
+
+        generated = generate_addresses(graph, 'router1', {}, {'router1': 'router'})
+
+        # default address is replaced by user-defined one with same prefix and distribution
+        assert_equals(['a', 'closest', 'multicast', 'unicast', 'exclusive', 'broadcast'],
+                      [item['prefix'] for item in generated])
+        assert_equals('yes', generated[1]['waypoint'])
+        assert 'Duplicate address' in sys.stderr.getvalue()
+
+    def test_connectors(self):
+        graph = nx.Graph()
+        graph.add_node('router1', type='router',
+                       connector=[{'name': 'broker1', 'host': 'broker1', 'port': '5672', 'role': 'route-container'},
+                                  {'name': 'broker1', 'host': 'broker1', 'port': '5672', 'role': 'normal'}],
+                       linkRoute=[{'prefix': 'q', 'connection': 'broker1', 'dir': 'in'},
+                                  {'prefix': 'q', 'connection': 'broker1', 'dir': 'in'},
+                                  {'prefix': 'q', 'connection': 'broker2', 'dir': 'in'}])
+        graph.add_node('broker1', type='broker')
+        node_types = {'router1': 'router', 'broker1': 'broker'}
+
+        connectors, link_routes = generate_connectors(graph, 'router1', {'broker1': {}}, node_types)
+
+        assert_equals([{'name': 'broker1', 'host': 'broker1', 'port': '5672', 'role': 'route-container'}], connectors)
+        assert_equals([{'prefix': 'q', 'connection': 'broker1', 'dir': 'in'},
+                       {'prefix': 'router1_queue', 'connection': 'broker1', 'dir': 'in'},
+                       {'prefix': 'router1_queue', 'connection': 'broker1', 'dir': 'out'}], link_routes)
+        assert 'Duplicate connector' in sys.stderr.getvalue()
+        assert 'Duplicate linkRoute' in sys.stderr.getvalue()
+
+
 class GenerateConnectionInfo(unittest.TestCase):
     @classmethod
     def setup_class(cls):
@@ -606,7 +691,8 @@ class GenerateFullConfig(unittest.TestCase):
                             "name": "router2",
                             "host": "router2",
                             "port": '5673',
-                            "role": "inter-router"
+                            "role": "inter-router",
+                            "cost": 10
                         }
                     ],
                     "linkRoute": [
@@ -659,7 +745,8 @@ class GenerateFullConfig(unittest.TestCase):
                             "name": "router1",
                             "host": "router1",
                             "role": "inter-router",
-                            "port": "5673"
+                            "port": "5673",
+                            "cost": 10
                         },
                         {
                             "name": "broker2",
@@ -729,3 +816,281 @@ class GenerateFullConfig(unittest.TestCase):
                 sys.stderr.write("Diff machine: {} for '{}'\n".format(comp.diff, node))
 
         assert_equals(result, True)
+
+
+class IterConfig(unittest.TestCase):
+    @classmethod
+    def setup_class(cls):
+        cls.graph = nx.Graph()
+
+        cls.graph.add_node('router1', type='router')
+        cls.graph.add_node('router2', type='router')
+        cls.graph.add_node('router3', type='router', listener=[{'host': '0.0.0.0', 'port': '777', 'role': 'normal'}])
+        cls.graph.add_node('broker1', type='broker')
+
+        cls.graph.add_edge('router1', 'router2', value=1)
+        cls.graph.add_edge('router2', 'router3', value=1)
+        cls.graph.add_edge('router3', 'broker1', value=1)
+
+    def test_iter_conf_1(self):
+        generated = iter_conf(self.graph)
+        expected = get_conf(self.graph)
+
+        # first config is complete before the others are generated
+        node, conf = next(generated)
+        assert_equals(expected[node], conf)
+        assert_equals(sorted(set(expected) - set([node])), sorted(n for n, _ in generated))
+
+    def test_iter_conf_2(self):
+        calls = []
+        original = generate.generate_router_info
+        generate.generate_router_info = lambda *args: calls.append(args[1]) or original(*args)
+        try:
+            generated = iter_conf(self.graph)
+            # nothing is generated before first config is requested
+            assert_equals([], calls)
+            node, _ = next(generated)
+            assert_equals([node], calls)
+            rest = [n for n, _ in generated]
+        finally:
+            generate.generate_router_info = original
+
+        assert_equals(['router1', 'router2', 'router3'], sorted([node] + rest))
+        assert_equals(sorted(calls), sorted([node] + rest))
+
+    def test_iter_conf_3(self):
+        generated = dict(iter_conf(self.graph, nodes=['router3']))
+        expected = get_conf(self.graph)
+
+        assert_equals({'router3': expected['router3']}, generated)
+
+
+class PortTable(unittest.TestCase):
+    @classmethod
+    def setup_class(cls):
+        cls.graph = nx.Graph()
+
+        cls.graph.add_node('router1', type='router')
+        cls.graph.add_node('router2', type='router', listener=[{'host': '0.0.0.0', 'port': '777', 'role': 'inter-router'}])
+        cls.graph.add_node('router3', type='router')
+        cls.graph.add_node('broker1', type='broker')
+
+        cls.graph.add_edge('router1', 'router2', value=1)
+        cls.graph.add_edge('router2', 'router3', value=1)
+        cls.graph.add_edge('router3', 'broker1', value=1)
+
+    def test_iter_conf_ports(self):
+        ports = PortAllocator(DEFAULT_PORT)
+        generated = dict(iter_conf(self.graph, ports=ports))
+
+        assert_equals({'router1': {'normal': '5672', 'inter-router': '5673'},
+                       'router2': {'normal': '5672', 'inter-router': '777'},
+                       'router3': {'normal': '5672', 'inter-router': '5673', 'route-container': '5674'}},
+                      ports.export())
+        # connectors use first listener of role
+        assert_equals(['777'], [item['port'] for item in generated['router1']['connector']])
+
+    def test_allocate_ports(self):
+        ports = PortAllocator(DEFAULT_PORT)
+        list(iter_conf(self.graph, ports=ports))
+
+        assert_equals(ports.export(), allocate_ports(self.graph).export())
+
+    def create_packed_graph(self):
+        graph = self.graph.copy()
+        for node in ['router1', 'router2', 'broker1']:
+            graph.add_node(node, host='host1')
+        graph.add_node('router3', host='host2')
+        return graph
+
+    def test_standalone_connectors(self):
+        graph = self.graph
+        node_type = index_node_attributes(graph)['type']
+        connectors, _ = generate_connectors(graph, 'router2', graph['router2'], node_type)
+
+        # ports of generated neighbor listeners are allocated without allocator given
+        assert_equals([('router1', '5673'), ('router3', '5673')],
+                      sorted((item['name'], item['port']) for item in connectors))
+        assert_equals([('router2', '777')], [(item['name'], item['port'])
+                                             for item in generate_connectors(graph, 'router1', graph['router1'],
+                                                                             node_type)[0]])
+
+    def test_packed_hosts(self):
+        ports = PortAllocator(DEFAULT_PORT)
+        generated = dict(iter_conf(self.create_packed_graph(), ports=ports))
+
+        # user-defined port 777 is out of range, broker1 < router1 < router2
+        assert_equals({'host1': {'broker1': [5672, 5672], 'router1': [5673, 5676], 'router2': [5677, 5680]},
+                       'host2': {'router3': [5672, 5675]}}, ports.export_hosts())
+        assert_equals(['5673', '5674'], [item['port'] for item in generated['router1']['listener']])
+        assert_equals([{'name': 'router2', 'host': 'host1', 'port': '777', 'role': 'inter-router', 'cost': 1}],
+                      generated['router1']['connector'])
+        assert_equals([('broker1', 'host1', '5672'), ('router2', 'host1', '777')],
+                      sorted((item['name'], item['host'], item['port']) for item in generated['router3']['connector']))
+
+    def test_packed_reserved_port(self):
+        graph = self.create_packed_graph()
+        graph.add_node('router2', listener=[{'host': '0.0.0.0', 'port': '5673', 'role': 'inter-router'}])
+        ports = allocate_ports(graph)
+
+        assert_equals([5674, 5677], ports.export_hosts()['host1']['router1'])
+
+    def test_packed_hashes(self):
+        previous = hash_nodes(self.create_packed_graph())
+        graph = self.create_packed_graph()
+        graph.add_node('router3', host='host1')
+
+        # ports of instances on host1 can change, all its routers are regenerated
+        assert_equals(set(['router1', 'router2', 'router3']),
+                      get_affected_routers(graph, previous, hash_nodes(graph)))
+
+
+class ReadOnlyGraph(unittest.TestCase):
+    @classmethod
+    def setup_class(cls):
+        cls.graph = nx.Graph()
+
+        cls.graph.add_node('router1', type='router', router=[{'mode': 'interior'}],
+                       listener=[{'host': '0.0.0.0', 'port': '777', 'role': 'normal'}])
+        cls.graph.add_node('router2', type='router', address=[{'prefix': 'a', 'distribution': 'closest'}],
+                       connector=[{'name': 'broker1', 'host': 'broker1', 'port': '5672'}],
+                       linkRoute=[{'prefix': 'q', 'connection': 'broker1', 'dir': 'in'}])
+        cls.graph.add_node('router3', type='router')
+        cls.graph.add_node('broker1', type='broker')
+
+        cls.graph.add_edge('router1', 'router2', value=1)
+        cls.graph.add_edge('router2', 'router3', value=1)
+        cls.graph.add_edge('router2', 'broker1', value=1)
+
+    def test_graph_not_changed(self):
+        expected = copy.deepcopy(sorted(self.graph.nodes(data=True)))
+        get_conf(self.graph)
+
+        assert_equals(expected, sorted(self.graph.nodes(data=True)))
+
+    def test_repeated_calls(self):
+        expected = get_conf(self.graph)
+
+        assert_equals(expected, get_conf(self.graph))
+        assert_equals(expected, get_conf(self.graph))
+        assert_equals(['machine', 'router', 'listener', 'address'],
+                      [key for key in ['machine', 'router', 'listener', 'address', 'addresses', 'connectors']
+                       if key in get_conf(self.graph)['router3']])
+
+    def test_concurrent_calls(self):
+        expected = get_conf(self.graph)
+        pool = ThreadPool(4)
+        try:
+            results = pool.map(get_conf, [self.graph] * 16)
+        finally:
+            pool.close()
+            pool.join()
+
+        for result in results:
+            assert_equals(expected, result)
+
+
+class EdgeTier(unittest.TestCase):
+    @classmethod
+    def setup_class(cls):
+        cls.graph = nx.Graph()
+
+        cls.graph.add_node('router1', type='router')
+        cls.graph.add_node('router2', type='router')
+        cls.graph.add_node('edge1', type='router', tier='edge')
+        cls.graph.add_node('edge2', type='router', tier='edge')
+        cls.graph.add_node('broker1', type='broker')
+
+        cls.graph.add_edge('router1', 'router2', value=1)
+        cls.graph.add_edge('edge1', 'router1', value=1)
+        cls.graph.add_edge('edge2', 'router1', value=1)
+        cls.graph.add_edge('edge2', 'router2', value=1)
+        cls.graph.add_edge('edge1', 'edge2', value=1)
+        cls.graph.add_edge('edge1', 'broker1', value=1)
+
+    def test_edge_router_info(self):
+        generated = get_conf(self.graph)
+
+        assert_equals('edge', generated['edge1']['router'][0]['mode'])
+        assert_equals('interior', generated['router1']['router'][0]['mode'])
+
+    def test_edge_listeners(self):
+        generated = get_conf(self.graph)
+
+        assert_equals([('normal', '5672'), ('inter-router', '5673'), ('edge', '5674')],
+                      [(item['role'], item['port']) for item in generated['router1']['listener']])
+        assert_equals([('normal', '5672'), ('route-container', '5673')],
+                      [(item['role'], item['port']) for item in generated['edge1']['listener']])
+
+    def test_edge_connectors(self):
+        generated = get_conf(self.graph)
+
+        assert_equals([{'name': 'router1', 'host': 'router1', 'port': '5674', 'role': 'edge'},
+                       {'name': 'router2', 'host': 'router2', 'port': '5674', 'role': 'edge'}],
+                      sorted(generated['edge2']['connector'], key=lambda item: item['name']))
+        assert_equals(['broker1', 'router1'], sorted(item['name'] for item in generated['edge1']['connector']))
+        # interior routers don't connect to edge routers
+        assert_equals([('router2', 'inter-router')],
+                      [(item['name'], item['role']) for item in generated['router1']['connector']])
+
+
+class AffectedRouters(unittest.TestCase):
+    @classmethod
+    def setup_class(cls):
+        cls.graph = nx.Graph()
+
+        cls.graph.add_node('router1', type='router')
+        cls.graph.add_node('router2', type='router')
+        cls.graph.add_node('router3', type='router')
+        cls.graph.add_node('router4', type='router')
+        cls.graph.add_node('broker1', type='broker')
+
+        cls.graph.add_edge('router1', 'router2', value=1)
+        cls.graph.add_edge('router2', 'router3', value=1)
+        cls.graph.add_edge('router3', 'router4', value=1)
+        cls.graph.add_edge('router4', 'broker1', value=1)
+
+    def test_tier_change(self):
+        graph = nx.Graph()
+        graph.add_node('router_y', type='router')
+        graph.add_node('router_w', type='router')
+        graph.add_node('edge_e', type='router', tier='edge')
+        graph.add_edge('router_y', 'router_w', value=1)
+        graph.add_edge('router_y', 'edge_e', value=1)
+        previous_confs = get_conf(graph)
+        previous = hash_nodes(graph)
+
+        graph.add_node('router_w', tier='edge')
+        confs = get_conf(graph)
+        affected = get_affected_routers(graph, previous, hash_nodes(graph))
+
+        # edge listener of router_y moves, edge_e connecting to it has to be regenerated
+        assert previous_confs['edge_e'] != confs['edge_e']
+        assert_equals(set(['router_y', 'router_w', 'edge_e']), affected)
+        for node in set(confs) - affected:
+            assert_equals(previous_confs[node], confs[node])
+
+    def test_hash_nodes(self):
+        hashes = hash_nodes(self.graph)
+
+        assert_equals(hashes, hash_nodes(self.graph.copy()))
+        assert_equals(5, len(set(hashes.values())))
+
+    def test_affected_routers_1(self):
+        assert_equals(set(), get_affected_routers(self.graph, hash_nodes(self.graph), hash_nodes(self.graph.copy())))
+
+    def test_affected_routers_2(self):
+        previous = hash_nodes(self.graph)
+        graph = self.graph.copy()
+        graph.add_node('router5', type='router')
+        graph.add_edge('router5', 'router1', value=1)
+
+        assert_equals(set(['router1', 'router2', 'router5']), get_affected_routers(graph, previous, hash_nodes(graph)))
+
+    def test_affected_routers_3(self):
+        previous = hash_nodes(self.graph)
+        graph = self.graph.copy()
+        graph.remove_node('broker1')
+
+        # router4 lost broker, router3 connects to listener of router4
+        assert_equals(set(['router3', 'router4']), get_affected_routers(graph, previous, hash_nodes(graph)))
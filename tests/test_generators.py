@@ -0,0 +1,134 @@
+import sys
+import unittest
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    # Python 3
+    from io import StringIO
+
+import networkx as nx
+import pkg_resources
+from nose.tools import assert_equals, raises
+
+from msg_topgen import generators
+from msg_topgen.generators import GENERATORS, Generator, get_generator, register_generator
+from msg_topgen.topology import Topology
+
+
+def names(prefix, count):
+    return ['%s%d' % (prefix, x) for x in range(count)]
+
+
+class RingGenerator(Generator):
+    def edge_count(self, routers, brokers):
+        return routers if routers > 2 else max(routers - 1, 0)
+
+    def build(self, topology, graph, routers, brokers):
+        graph.add_edges_from(zip(routers, routers[1:] + routers[:1]), value=topology.DEFAULT_COST)
+
+
+class IncompleteGenerator(Generator):
+    def edge_count(self, routers, brokers):
+        return 0
+
+
+class FakeEntryPoint(object):
+    def __init__(self, name, generator):
+        self.name = name
+        self.generator = generator
+
+    def load(self):
+        return self.generator
+
+
+class GeneratorsTest(unittest.TestCase):
+    def create(self, graph_type, routers, brokers, backend='networkx'):
+        topology = Topology(backend=backend)
+        topology.create_graph(names('router', routers), names('broker', brokers), graph_type)
+        return topology.graph
+
+    def test_edge_count(self):
+        for graph_type, generator in GENERATORS.items():
+            for routers, brokers in [(1, 1), (2, 3), (7, 2), (20, 5)]:
+                for backend in ['networkx', 'compact']:
+                    graph = self.create(graph_type, routers, brokers, backend)
+                    assert_equals((graph_type, generator.edge_count(routers, brokers)),
+                                  (graph_type, graph.number_of_edges()))
+
+    def test_hub_spoke(self):
+        graph = self.create('hub_spoke_graph', 5, 4)
+
+        assert_equals(4, len([n for n in graph['router0'] if n.startswith('router')]))
+        for broker in names('broker', 4):
+            assert_equals(1, len(graph[broker]))
+            assert 'router0' not in graph[broker]
+
+    def test_tree(self):
+        graph = self.create('tree_graph', 7, 4)
+
+        assert nx.is_tree(graph)
+        assert_equals(['router1', 'router2'], sorted(n for n in graph['router0']))
+        for broker in names('broker', 4):
+            assert list(graph[broker])[0] in ['router3', 'router4', 'router5', 'router6']
+
+    def test_two_tier(self):
+        graph = self.create('two_tier_graph', 16, 12)
+        interior = names('router', 4)
+
+        for router in interior:
+            assert_equals(set(interior) - set([router]), set(graph[router]) & set(interior))
+        for router in names('router', 16)[4:]:
+            assert_equals(1, len([n for n in graph[router] if n in interior]))
+        for broker in names('broker', 12):
+            assert list(graph[broker])[0] not in interior
+        assert_equals(['router%d' % x for x in range(4, 16)],
+                      sorted((n for n, data in graph.nodes(data=True) if data.get('tier') == 'edge'),
+                             key=lambda n: int(n[6:])))
+
+    def test_random_regular(self):
+        graph = self.create('random_regular_graph', 50, 0)
+
+        assert_equals(set([3]), set(dict(graph.degree()).values()))
+        assert_equals(sorted(graph.edges()), sorted(self.create('random_regular_graph', 50, 0).edges()))
+
+    def test_register_generator(self):
+        register_generator('test_ring_graph', RingGenerator())
+        try:
+            assert_equals(5, self.create('test_ring_graph', 5, 0).number_of_edges())
+        finally:
+            del GENERATORS['test_ring_graph']
+
+    def test_load_plugins(self):
+        iter_entry_points = pkg_resources.iter_entry_points
+        pkg_resources.iter_entry_points = lambda group: [FakeEntryPoint('ring_graph', RingGenerator)] \
+            if group == 'msg_topgen.generators' else []
+        generators._plugins_loaded = False
+        try:
+            assert isinstance(get_generator('ring_graph'), RingGenerator)
+        finally:
+            pkg_resources.iter_entry_points = iter_entry_points
+            GENERATORS.pop('ring_graph', None)
+
+    def test_incomplete_plugin(self):
+        iter_entry_points = pkg_resources.iter_entry_points
+        pkg_resources.iter_entry_points = lambda group: [FakeEntryPoint('incomplete_graph', IncompleteGenerator)] \
+            if group == 'msg_topgen.generators' else []
+        generators._plugins_loaded = False
+        stderr = sys.stderr
+        sys.stderr = StringIO()
+        try:
+            assert get_generator('incomplete_graph') is None
+            message = sys.stderr.getvalue()
+        finally:
+            sys.stderr = stderr
+            pkg_resources.iter_entry_points = iter_entry_points
+            GENERATORS.pop('incomplete_graph', None)
+
+        # plugin without build fails at instantiation, not when graph is created
+        assert 'Cannot load generator plugin' in message
+        assert 'build' in message
+
+    @raises(SystemExit)
+    def test_unknown_generator(self):
+        self.create('none_exists', 2, 2)
@@ -0,0 +1,179 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from nose.tools import assert_equals
+
+from msg_topgen.arg_parser import Config
+from msg_topgen.generate import allocate_ports, get_conf
+from msg_topgen.msg_topgen import generate_incremental_output, write_confs, write_port_table, write_routing_table, \
+    write_shards
+from msg_topgen.routing import routing_table
+from msg_topgen.topology import Topology
+
+
+class WriteConfsTest(unittest.TestCase):
+    def write(self, confs):
+        with tempfile.TemporaryFile('w+') as stream:
+            write_confs(stream, confs)
+            stream.seek(0)
+            return json.load(stream)
+
+    def test_write_confs(self):
+        confs = [{'machine': 'router1', 'router': [{'id': 'router1', 'mode': 'interior'}]},
+                 {'machine': 'router2', 'router': [{'id': 'router2', 'mode': 'interior'}]}]
+
+        assert_equals({'confs': confs}, self.write(iter(confs)))
+
+    def test_write_empty_confs(self):
+        assert_equals({'confs': []}, self.write([]))
+
+
+class WriteShardsTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_write_shards(self):
+        confs = dict(('router%d' % x, {'machine': 'router%d' % x, 'router': [{'id': 'router%d' % x}]})
+                     for x in range(1000))
+        directory = os.path.join(self.directory, 'routers')
+
+        index = write_shards(directory, confs.items(), workers=4)
+        assert_equals(dict((router_id, router_id + '.json') for router_id in confs), index)
+
+        with open(os.path.join(directory, 'index.json')) as f:
+            assert_equals({'format': 'json', 'routers': index}, json.load(f))
+        for router_id, conf in confs.items():
+            with open(os.path.join(directory, index[router_id])) as f:
+                assert_equals(conf, json.load(f))
+
+    def test_write_shards_unsafe_ids(self):
+        directory = os.path.join(self.directory, 'routers')
+        confs = [(1, {'machine': 1}), ('../router1', {'machine': '../router1'}),
+                 ('.._router1', {'machine': '.._router1'})]
+
+        index = write_shards(directory, confs)
+        assert_equals(['../router1', '.._router1', '1'], sorted(index))
+        assert_equals('1.json', index['1'])
+        # files stay in directory, replaced characters don't merge IDs
+        assert_equals(sorted(index.values()) + ['index.json'], sorted(os.listdir(directory)))
+        assert_equals(3, len(set(index.values())))
+        with open(os.path.join(directory, index['../router1'])) as f:
+            assert_equals({'machine': '../router1'}, json.load(f))
+
+
+class WriteRoutingTableTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_write_routing_table(self):
+        topology = Topology()
+        topology.create_graph(['router1', 'router2', 'router3'], ['broker1'], 'line_graph')
+        write_routing_table(self.directory, topology)
+
+        with open(os.path.join(self.directory, 'routing_table.json')) as f:
+            assert_equals({'routers': routing_table(topology.graph, workers=1)}, json.load(f))
+
+
+class WritePortTableTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_write_port_table(self):
+        topology = Topology()
+        topology.create_graph(['router1', 'router2'], ['broker1'], 'line_graph')
+        write_port_table(self.directory, allocate_ports(topology.graph))
+
+        with open(os.path.join(self.directory, 'port_table.json')) as f:
+            ports = json.load(f)['routers']
+        assert_equals(set(['router1', 'router2']), set(ports))
+        assert_equals('5672', ports['router1']['normal'])
+        assert_equals('5673', ports['router1']['inter-router'])
+
+
+class IncrementalOutputTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.config = Config()
+        self.config.out_dir = self.directory
+        self.config.no_image = True
+        self.config.generate_hosts('line_graph', 4, 1)
+        self.output = os.path.join(self.directory, 'line_graph_R4_B1')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def create_topology(self, extra_router=False):
+        topology = Topology()
+        topology.create_graph(list(self.config.router_names), list(self.config.broker_names), 'line_graph')
+        if extra_router:
+            topology.graph.add_node('router5', type='router')
+            topology.graph.add_edge('router5', 'router1', value=1)
+        return topology
+
+    def load_confs(self):
+        with open(os.path.join(self.output, 'router_confs.json')) as f:
+            return dict((conf['machine'], conf) for conf in json.load(f)['confs'])
+
+    def test_incremental_shards(self):
+        self.config.shard = True
+
+        assert_equals(None, generate_incremental_output(self.config, self.create_topology()))
+        assert_equals(set(), generate_incremental_output(self.config, self.create_topology()))
+
+        # mark file of not affected router, it must not be rewritten
+        with open(os.path.join(self.output, 'routers', 'router4.json'), 'w') as f:
+            f.write('{}')
+
+        routers = generate_incremental_output(self.config, self.create_topology(extra_router=True))
+        assert_equals(set(['router1', 'router2', 'router5']), routers)
+
+        with open(os.path.join(self.output, 'routers', 'index.json')) as f:
+            index = json.load(f)['routers']
+        assert_equals(['router1', 'router2', 'router3', 'router4', 'router5'], sorted(index))
+        with open(os.path.join(self.output, 'routers', 'router4.json')) as f:
+            assert_equals({}, json.load(f))
+        with open(os.path.join(self.output, 'routers', 'router5.json')) as f:
+            assert_equals(get_conf(self.create_topology(extra_router=True).graph)['router5'], json.load(f))
+
+        # removed router
+        generate_incremental_output(self.config, self.create_topology())
+        assert_equals(False, os.path.exists(os.path.join(self.output, 'routers', 'router5.json')))
+
+    def test_incremental_single_file(self):
+        generate_incremental_output(self.config, self.create_topology())
+        generate_incremental_output(self.config, self.create_topology(extra_router=True))
+
+        assert_equals(get_conf(self.create_topology(extra_router=True).graph), self.load_confs())
+
+        generate_incremental_output(self.config, self.create_topology())
+        assert_equals(get_conf(self.create_topology().graph), self.load_confs())
+
+    def test_incremental_numeric_ids(self):
+        topology = Topology()
+        topology.create_graph([1, 2, 3], [], 'line_graph')
+
+        generate_incremental_output(self.config, topology)
+        # IDs are strings in stored hashes, unchanged graph has no affected router
+        assert_equals(set(), generate_incremental_output(self.config, topology))
+        assert_equals(['1', '2', '3'], sorted(str(node) for node in self.load_confs()))
+
+    def test_incremental_new_outputs(self):
+        generate_incremental_output(self.config, self.create_topology())
+        self.config.report = self.config.routing_table = self.config.port_table = True
+
+        # graph isn't changed, newly requested outputs are written anyway
+        assert_equals(set(), generate_incremental_output(self.config, self.create_topology()))
+        for name in ['report.json', 'routing_table.json', 'port_table.json']:
+            assert_equals(True, os.path.isfile(os.path.join(self.output, name)))
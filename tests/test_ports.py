@@ -0,0 +1,102 @@
+import unittest
+
+from nose.tools import assert_equals, raises
+
+from msg_topgen.ports import BROKER_PORTS, ROUTER_PORTS, HostPacking, PortAllocator, PortRanges
+
+
+class PortAllocatorTest(unittest.TestCase):
+    def test_allocate(self):
+        ports = PortAllocator(5672)
+
+        assert_equals(['5672', '5673', '5674'], [ports.allocate('router1', role)
+                                                 for role in ['normal', 'inter-router', 'inter-router']])
+        assert_equals('5672', ports.allocate('router2', 'normal'))
+        # first listener of role is used
+        assert_equals('5673', ports.get('router1', 'inter-router'))
+        assert_equals(None, ports.get('router2', 'inter-router'))
+        assert_equals({'router1': {'normal': '5672', 'inter-router': '5673'}, 'router2': {'normal': '5672'}},
+                      ports.export())
+
+    def test_record_listeners(self):
+        ports = PortAllocator(5672)
+        ports.record_listeners('router1', [{'port': '777', 'role': 'normal'}, {'port': '778', 'role': 'edge'}])
+        ports.allocate('router1', 'normal')
+
+        assert 'router1' in ports
+        assert_equals('777', ports.get('router1', 'normal'))
+        assert_equals('778', ports.get('router1', 'edge'))
+
+    @raises(AttributeError)
+    def test_listener_without_role(self):
+        ports = PortAllocator(5672)
+        ports.record_listeners('router1', [{'port': '777'}])
+        ports.allocate('router1', 'inter-router')
+
+        ports.get('router1', 'inter-router')
+
+
+class PortRangesTest(unittest.TestCase):
+    def test_allocate(self):
+        ranges = PortRanges(5672)
+        ranges.reserve(5674)
+        ranges.reserve(5680, 2)
+
+        assert_equals(5675, ranges.allocate(4))
+        assert_equals(5672, ranges.allocate(2))
+        assert_equals(5679, ranges.allocate(1))
+        assert_equals(5682, ranges.allocate(4))
+        # touching ranges are merged
+        assert_equals(([5672], [5686]), (ranges.starts, ranges.ends))
+        assert 5685 in ranges
+        assert 5686 not in ranges
+
+    def test_many_blocks(self):
+        ranges = PortRanges(5672)
+        for port in range(5700, 20000, 7):
+            ranges.reserve(port)
+        blocks = [ranges.allocate(4) for _ in range(5000)]
+
+        ports = [port for start in blocks for port in range(start, start + 4)]
+        assert_equals(len(ports), len(set(ports)))
+        assert not set(ports) & set(range(5700, 20000, 7))
+
+    @raises(ValueError)
+    def test_exhausted(self):
+        ranges = PortRanges(65530)
+        ranges.allocate(4)
+        ranges.allocate(4)
+
+
+class HostPackingTest(unittest.TestCase):
+    def test_packing(self):
+        packing = HostPacking(5672)
+        packing.reserve('host1', '5673')
+        packing.reserve('host1', 'amqp')
+        packing.add('host1', 'router1', ROUTER_PORTS)
+        packing.add('host1', 'broker1', BROKER_PORTS)
+        packing.add('host2', 'router2', ROUTER_PORTS)
+
+        assert_equals({'host1': {'router1': [5674, 5677], 'broker1': [5672, 5672]},
+                       'host2': {'router2': [5672, 5675]}}, packing.export())
+        assert_equals('host1', packing.host('broker1'))
+
+    def test_allocator(self):
+        packing = HostPacking(5672)
+        packing.add('host1', 'router1', ROUTER_PORTS)
+        packing.add('host1', 'router2', ROUTER_PORTS)
+        packing.add('host1', 'broker1', BROKER_PORTS)
+        ports = PortAllocator(5672, packing)
+
+        assert_equals(['5676', '5677'], [ports.allocate('router2', role) for role in ['normal', 'inter-router']])
+        assert_equals('5672', ports.allocate('router3', 'normal'))
+        assert_equals(('host1', 'router3'), (ports.host('router2'), ports.host('router3')))
+        assert_equals(('5680', '5672'), (ports.broker_port('broker1'), ports.broker_port('broker2')))
+
+    @raises(ValueError)
+    def test_allocator_block(self):
+        packing = HostPacking(5672)
+        packing.add('host1', 'router1', 1)
+        ports = PortAllocator(5672, packing)
+        ports.allocate('router1', 'normal')
+        ports.allocate('router1', 'inter-router')
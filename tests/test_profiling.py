@@ -0,0 +1,73 @@
+import unittest
+
+from nose.tools import assert_equals
+
+from msg_topgen import generate
+from msg_topgen.generate import get_conf
+from msg_topgen.profiling import GENERATE_FUNCTIONS, Profiler
+from msg_topgen.topology import Topology
+
+
+class ProfilerTest(unittest.TestCase):
+    @classmethod
+    def setup_class(cls):
+        topology = Topology()
+        topology.create_graph(['router%d' % x for x in range(10)], ['broker1'], 'line_graph')
+        cls.graph = topology.graph
+
+    def test_stage(self):
+        profiler = Profiler()
+        with profiler.stage('sum'):
+            sum(range(100000))
+
+        stage = profiler.report()['stages'][0]
+        assert_equals(['cpu', 'name', 'peak_growth_kb', 'peak_memory_kb', 'wall'], sorted(stage))
+        assert_equals('sum', stage['name'])
+        assert stage['wall'] >= 0
+        assert stage['peak_memory_kb'] > 0
+
+    def test_instrument(self):
+        profiler = Profiler()
+        original = generate.generate_listeners
+        profiler.instrument(generate, GENERATE_FUNCTIONS)
+        try:
+            confs = get_conf(self.graph)
+        finally:
+            profiler.restore()
+
+        assert generate.generate_listeners is original
+        functions = profiler.report()['functions']
+        assert_equals(1, functions['generate.index_node_attributes']['calls'])
+        assert_equals(len(confs), functions['generate.generate_connectors']['calls'])
+        assert_equals(len(confs), functions['generate.generate_listeners']['calls'])
+
+    def test_instrument_method(self):
+        profiler = Profiler()
+        original = vars(Topology)['networkx_graph']
+        profiler.instrument(Topology, ['networkx_graph'])
+        try:
+            topology = Topology()
+            topology.create_graph(['router1'], [], 'line_graph')
+            assert_equals(1, topology.networkx_graph().number_of_nodes())
+        finally:
+            profiler.restore()
+
+        assert_equals(1, profiler.report()['functions']['Topology.networkx_graph']['calls'])
+        assert vars(Topology)['networkx_graph'] is original
+
+    def test_instrument_ports(self):
+        profiler = Profiler()
+        topology = Topology()
+        topology.create_graph(['router1', 'router2', 'router3'], ['broker1'], 'bus_graph')
+        topology.assign_hosts({'host1': ['router1', 'router2', 'router3', 'broker1']})
+        profiler.instrument(generate, GENERATE_FUNCTIONS)
+        try:
+            get_conf(topology.graph)
+            generate.allocate_ports(topology.graph)
+        finally:
+            profiler.restore()
+
+        functions = profiler.report()['functions']
+        assert_equals(1, functions['generate.allocate_ports']['calls'])
+        # once by iter_conf, once by allocate_ports
+        assert_equals(2, functions['generate.pack_hosts']['calls'])
@@ -0,0 +1,73 @@
+import unittest
+
+from nose.tools import assert_equals
+
+from msg_topgen.qdrouterd import render_conf, render_section
+
+
+class RenderSectionTest(unittest.TestCase):
+    def test_render_section_1(self):
+        section = ("listener {\n"
+                   "    authenticatePeer: no\n"
+                   "    host: 0.0.0.0\n"
+                   "    port: 5672\n"
+                   "    role: normal\n"
+                   "}\n")
+
+        rendered = render_section('listener', {'host': '0.0.0.0', 'port': 5672, 'role': 'normal',
+                                               'authenticatePeer': False})
+        assert_equals(section, rendered)
+
+    def test_render_section_2(self):
+        # same format is reused with other values
+        section = ("listener {\n"
+                   "    authenticatePeer: yes\n"
+                   "    host: 1.1.1.1\n"
+                   "    port: 5673\n"
+                   "    role: inter-router\n"
+                   "}\n")
+
+        rendered = render_section('listener', {'host': '1.1.1.1', 'port': '5673', 'role': 'inter-router',
+                                               'authenticatePeer': True})
+        assert_equals(section, rendered)
+
+
+class RenderConfTest(unittest.TestCase):
+    def test_render_conf(self):
+        conf = {
+            'machine': 'router1',
+            'router': [{'id': 'router1', 'mode': 'interior'}],
+            'listener': [{'host': '0.0.0.0', 'port': '5672'}],
+            'connector': [{'host': 'broker1', 'port': '5672', 'role': 'route-container'}],
+            'linkRoute': [{'prefix': 'queue', 'connection': 'broker1', 'dir': 'in'}],
+            'sslProfile': [{'name': 'Test', 'ciphers': 'AES-256'}],
+            'addresses': [{'prefix': 'closest', 'distribution': 'closest'}]
+        }
+        expected = ("router {\n"
+                    "    id: router1\n"
+                    "    mode: interior\n"
+                    "}\n"
+                    "\n"
+                    "sslProfile {\n"
+                    "    ciphers: AES-256\n"
+                    "    name: Test\n"
+                    "}\n"
+                    "\n"
+                    "listener {\n"
+                    "    host: 0.0.0.0\n"
+                    "    port: 5672\n"
+                    "}\n"
+                    "\n"
+                    "connector {\n"
+                    "    host: broker1\n"
+                    "    port: 5672\n"
+                    "    role: route-container\n"
+                    "}\n"
+                    "\n"
+                    "linkRoute {\n"
+                    "    connection: broker1\n"
+                    "    dir: in\n"
+                    "    prefix: queue\n"
+                    "}\n")
+
+        assert_equals(expected, render_conf(conf))
@@ -0,0 +1,102 @@
+import unittest
+
+import networkx as nx
+from nose.tools import assert_equals
+
+from msg_topgen import report
+from msg_topgen.generate import iter_conf
+from msg_topgen.report import bfs_distances, connected_components, count_links, create_report, graph_diameter
+from msg_topgen.topology import Topology
+
+
+class ReportTest(unittest.TestCase):
+    @classmethod
+    def setup_class(cls):
+        cls.graph = nx.Graph()
+
+        cls.graph.add_nodes_from(['router1', 'router2', 'router3', 'router4'], type='router')
+        cls.graph.add_nodes_from(['broker1', 'broker2'], type='broker')
+
+        cls.graph.add_edge('router1', 'router2', value=1)
+        cls.graph.add_edge('router2', 'router3', value=1)
+        cls.graph.add_edge('router3', 'router1', value=1)
+        cls.graph.add_edge('router3', 'router4', value=1)
+        cls.graph.add_edge('router4', 'broker1', value=1)
+        cls.graph.add_edge('router4', 'broker2', value=1)
+
+    def create_report(self, graph):
+        counts = {}
+        generated = dict(count_links(iter_conf(graph), counts))
+        return generated, create_report(graph, counts)
+
+    def test_routers(self):
+        generated, created = self.create_report(self.graph)
+
+        assert_equals({'degree': 3, 'router_links': 1, 'broker_links': 2, 'listeners': 3, 'connectors': 3,
+                       'router_connections': 2, 'max_hops': 2}, created['routers']['router4'])
+        assert_equals(len(generated['router3']['listener']), created['routers']['router3']['listeners'])
+        # each router connects to each router neighbor
+        assert_equals(6, created['routers']['router3']['router_connections'])
+
+    def test_packed_hosts(self):
+        topology = Topology()
+        topology.create_graph(['router1', 'router2', 'router3'], [], 'complete_graph')
+        topology.assign_hosts({'host1': ['router1', 'router2', 'router3']})
+        _, created = self.create_report(topology.graph)
+
+        # connectors point to shared host, connections are counted by neighbor router
+        for router in ['router1', 'router2', 'router3']:
+            assert_equals(4, created['routers'][router]['router_connections'])
+
+    def test_summary(self):
+        _, created = self.create_report(self.graph)
+
+        assert_equals({'min': 2, 'max': 3, 'mean': 2.5}, created['summary']['degree'])
+        assert_equals({'2': 2, '3': 2}, created['summary']['degree_distribution'])
+        assert_equals(4, created['summary']['router_links'])
+        assert_equals(2, created['summary']['diameter'])
+        assert_equals(True, created['summary']['diameter_exact'])
+        assert_equals(True, created['summary']['max_hops_exact'])
+        assert_equals(['router3'], created['summary']['articulation_points'])
+        assert_equals(1, created['summary']['components'])
+
+    def test_estimated_diameter(self):
+        topology = Topology()
+        topology.create_graph(['router%d' % x for x in range(100)], ['broker1'], 'tree_graph')
+        adjacency = dict((node, [out for out in topology.graph[node]]) for node in topology.graph)
+        components = connected_components(adjacency)
+
+        # diameter of tree is found by double sweep
+        assert_equals(graph_diameter(adjacency, components, True)[0], graph_diameter(adjacency, components, False)[0])
+
+    def test_large_report(self):
+        _, exact = self.create_report(self.graph)
+        work = report.EXACT_WORK
+        report.EXACT_WORK = 10
+        try:
+            _, created = self.create_report(self.graph)
+        finally:
+            report.EXACT_WORK = work
+
+        assert_equals(False, created['summary']['diameter_exact'])
+        assert_equals(False, created['summary']['max_hops_exact'])
+        assert_equals(2, created['summary']['diameter'])
+        # estimated max hops are lower bounds of exact ones
+        for router in ['router1', 'router2', 'router3', 'router4']:
+            assert 0 < created['routers'][router]['max_hops'] <= exact['routers'][router]['max_hops']
+
+    def test_estimated_max_hops(self):
+        topology = Topology()
+        topology.create_graph(['router%d' % x for x in range(10)], [], 'line_graph')
+        adjacency = dict((node, [out for out in topology.graph[node]]) for node in topology.graph)
+        components = connected_components(adjacency)
+
+        # sweeps reach both ends of line, estimation is exact
+        assert_equals(graph_diameter(adjacency, components, True), graph_diameter(adjacency, components, False))
+
+    def test_bfs_distances(self):
+        adjacency = {'a': ['b'], 'b': ['a', 'c'], 'c': ['b'], 'd': []}
+
+        assert_equals({'a': 0, 'b': 1, 'c': 2}, bfs_distances(adjacency, 'a'))
+        assert_equals([['a', 'b', 'c'], ['d']], sorted(sorted(component)
+                                                       for component in connected_components(adjacency)))
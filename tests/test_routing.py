@@ -0,0 +1,61 @@
+import unittest
+
+import networkx as nx
+from nose.tools import assert_equals
+
+from msg_topgen.routing import routing_graph, routing_table
+from msg_topgen.topology import Topology
+
+
+class RoutingTableTest(unittest.TestCase):
+    @classmethod
+    def setup_class(cls):
+        cls.graph = nx.Graph()
+
+        cls.graph.add_nodes_from(['router1', 'router2', 'router3', 'router4'], type='router')
+        cls.graph.add_node('broker1', type='broker')
+
+        cls.graph.add_edge('router1', 'router2', value=1)
+        cls.graph.add_edge('router2', 'router3', value=1)
+        cls.graph.add_edge('router1', 'router3', value=5)
+        cls.graph.add_edge('router3', 'router4')
+        cls.graph.add_edge('router4', 'broker1', value=1)
+
+    def test_routing_graph(self):
+        adjacency, edge_routers = routing_graph(self.graph)
+
+        assert_equals(set(['router1', 'router2', 'router3', 'router4']), set(adjacency))
+        assert_equals([('router3', 1)], adjacency['router4'])
+        assert_equals(set(), edge_routers)
+
+    def test_routing_table(self):
+        table = routing_table(self.graph, workers=1)
+
+        assert_equals({'cost': 0, 'hops': 0, 'next_hop': None}, table['router1']['router1'])
+        # cheaper path through router2
+        assert_equals({'cost': 2, 'hops': 2, 'next_hop': 'router2'}, table['router1']['router3'])
+        assert_equals({'cost': 3, 'hops': 3, 'next_hop': 'router2'}, table['router1']['router4'])
+        assert_equals({'cost': 3, 'hops': 3, 'next_hop': 'router3'}, table['router4']['router1'])
+        assert 'broker1' not in table['router4']
+
+    def test_edge_routers(self):
+        graph = self.graph.copy()
+        graph.add_node('edge1', type='router', tier='edge')
+        graph.add_node('edge2', type='router', tier='edge')
+        graph.add_edge('edge1', 'router1', value=1)
+        graph.add_edge('edge1', 'router4', value=1)
+        graph.add_edge('edge1', 'edge2', value=1)
+        graph.add_edge('edge2', 'router2', value=1)
+        table = routing_table(graph, workers=1)
+
+        # edge router doesn't forward traffic between its uplinks
+        assert_equals({'cost': 3, 'hops': 3, 'next_hop': 'router2'}, table['router1']['router4'])
+        assert_equals({'cost': 2, 'hops': 2, 'next_hop': 'router1'}, table['edge1']['router2'])
+        # no link between edge routers
+        assert_equals({'cost': 3, 'hops': 3, 'next_hop': 'router2'}, table['edge2']['edge1'])
+
+    def test_parallel(self):
+        topology = Topology()
+        topology.create_graph(['router%d' % x for x in range(250)], ['broker1'], 'random_regular_graph')
+
+        assert_equals(routing_table(topology.graph, workers=1), routing_table(topology.graph, workers=4))
@@ -0,0 +1,50 @@
+import copy
+import pickle
+import unittest
+
+from nose.tools import assert_equals, raises
+
+from msg_topgen.generate import get_conf
+from msg_topgen.templates import FrozenDict, listener_template
+from msg_topgen.topology import Topology
+
+
+class FrozenDictTest(unittest.TestCase):
+    @raises(TypeError)
+    def test_setitem(self):
+        FrozenDict({'port': '5672'})['port'] = '5673'
+
+    @raises(TypeError)
+    def test_update(self):
+        FrozenDict({'port': '5672'}).update(port='5673')
+
+    def test_copy_on_write(self):
+        shared = FrozenDict({'port': '5672'})
+        changed = dict(shared)
+        changed['port'] = '5673'
+
+        assert_equals({'port': '5672'}, shared)
+        assert copy.deepcopy(shared) is shared
+        assert_equals(dict, type(shared.copy()))
+
+    def test_pickle(self):
+        shared = FrozenDict({'port': '5672'})
+        loaded = pickle.loads(pickle.dumps(shared, pickle.HIGHEST_PROTOCOL))
+
+        assert_equals(shared, loaded)
+        assert isinstance(loaded, FrozenDict)
+
+
+class TemplatesTest(unittest.TestCase):
+    def test_listener_template(self):
+        assert listener_template('normal', '5672') is listener_template('normal', '5672')
+        assert_equals({'host': '0.0.0.0', 'port': '5673', 'role': 'inter-router', 'authenticatePeer': 'no',
+                       'saslMechanisms': 'ANONYMOUS'}, listener_template('inter-router', '5673'))
+
+    def test_shared_components(self):
+        topology = Topology()
+        topology.create_graph(['router1', 'router2', 'router3'], [], 'line_graph')
+        confs = get_conf(topology.graph)
+
+        assert confs['router1']['address'][0] is confs['router2']['address'][0]
+        assert confs['router1']['listener'][0] is confs['router3']['listener'][0]
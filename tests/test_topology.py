@@ -1,7 +1,15 @@
 import itertools
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
 import unittest
 
 import networkx as nx
+from networkx.readwrite import json_graph
+import yaml
 from nose.tools import assert_equals, raises
 
 from msg_topgen.topology import Topology
@@ -39,6 +47,23 @@ class LoadTopologyTest(unittest.TestCase):
         self.topology.load_graph_from_json('tests/items/ref_graph_test.yml')
         assert_equals(nx.is_isomorphic(self.graph, self.topology.graph), True)
 
+    def test_parse_json_graph(self):
+        # JSON file is parsed by json module with same result as by YAML loader
+        with open('tests/items/graph_test.yml') as stream:
+            expected = yaml.safe_load(stream)
+        assert_equals(expected, Topology.parse_graph_file('tests/items/graph_test.yml'))
+
+    def test_parse_flow_yaml_graph(self):
+        handle, filename = tempfile.mkstemp(suffix='.yml')
+        with os.fdopen(handle, 'w') as stream:
+            stream.write("{directed: false, multigraph: false, graph: {}, nodes: [{id: router1, type: router}], "
+                         "links: []}")
+        try:
+            graph_json = Topology.parse_graph_file(filename)
+        finally:
+            os.remove(filename)
+        assert_equals([{'id': 'router1', 'type': 'router'}], graph_json['nodes'])
+
 
 class SmallTopologyTest(unittest.TestCase):
     @classmethod
@@ -155,6 +180,23 @@ class BiggerTopologyTest(unittest.TestCase):
         self.topology.create_graph(self.routers, self.brokers, 'complete_graph')
         assert_equals(nx.is_isomorphic(self.graph, self.topology.graph), True)
 
+    def test_edge_cost(self):
+        for graph_type in ['line_graph', 'line_mix_graph', 'bus_graph', 'complete_graph', 'cycle_graph']:
+            # line_mix_graph pops nodes from given lists
+            self.topology.create_graph(['router1', 'router2'], ['broker1', 'broker2', 'broker3'], graph_type)
+
+            assert_equals(set([Topology.DEFAULT_COST]),
+                          set(data.get('value') for _, _, data in self.topology.graph.edges(data=True)))
+
+    def test_assign_hosts(self):
+        for backend in ['networkx', 'compact']:
+            topology = Topology(backend=backend)
+            topology.create_graph(['router1', 'router2'], ['broker1'], 'line_graph')
+            topology.assign_hosts({'host1': ['router1', 'broker1', 'router9'], 'host2': ['router2']})
+
+            assert_equals({'router1': 'host1', 'broker1': 'host1', 'router2': 'host2'},
+                          dict((node, data.get('host')) for node, data in topology.graph.nodes(data=True)))
+
 
 class HugeBrokerTopologyTest(unittest.TestCase):
     @classmethod
@@ -296,3 +338,175 @@ class HugeRouterTopologyTest(unittest.TestCase):
 
         self.topology.create_graph(self.routers, self.brokers, 'complete_graph')
         assert_equals(nx.is_isomorphic(self.graph, self.topology.graph), True)
+
+
+class ImportTopologyTest(unittest.TestCase):
+    def test_lazy_drawing_import(self):
+        # Generating of configs only has to start without matplotlib (cold-start budget)
+        code = "import sys, msg_topgen.msg_topgen; sys.exit('matplotlib' in sys.modules)"
+        assert_equals(subprocess.call([sys.executable, '-c', code]), 0)
+
+
+class LayoutTopologyTest(unittest.TestCase):
+    @classmethod
+    def setup_class(cls):
+        cls.topology = Topology()
+        cls.routers = ['router1', 'router2', 'router3', 'router4']
+        cls.brokers = ['broker1', 'broker2']
+
+    def setUp(self):
+        self.topology.create_graph(list(self.routers), list(self.brokers), 'bus_graph')
+
+    def tearDown(self):
+        self.topology.LAYOUT_THRESHOLD = Topology.LAYOUT_THRESHOLD
+
+    def test_spring_layout_reproducible(self):
+        pos = self.topology.get_layout('bus_graph')
+
+        for node, position in self.topology.get_layout('bus_graph').items():
+            assert_equals(list(pos[node]), list(position))
+
+    def test_role_layout(self):
+        self.topology.LAYOUT_THRESHOLD = 3
+        pos = self.topology.get_layout('bus_graph')
+
+        assert_equals(sorted(pos.keys()), sorted(self.routers + self.brokers))
+        # all routers are above brokers
+        assert_equals(min(pos[r][1] for r in self.routers) > max(pos[b][1] for b in self.brokers), True)
+        assert_equals(pos, self.topology.get_layout('bus_graph'))
+
+
+class ExportTopologyTest(unittest.TestCase):
+    @classmethod
+    def setup_class(cls):
+        cls.topology = Topology()
+        cls.topology.create_graph(['router1', 'router2', 'router3'], ['broker1', 'broker2'], 'bus_graph')
+        cls.directory = tempfile.mkdtemp()
+
+    @classmethod
+    def teardown_class(cls):
+        shutil.rmtree(cls.directory)
+
+    def export(self, count):
+        for x in range(count):
+            self.topology.export_graph(os.path.join(self.directory, 'topology%d.svg' % x), 'test', 'bus_graph')
+
+    def test_export_graph(self):
+        self.export(1)
+        assert_equals(os.path.getsize(os.path.join(self.directory, 'topology0.svg')) > 0, True)
+
+    def test_repeated_export_memory(self):
+        # warm up caches of matplotlib (fonts, etc.)
+        self.export(20)
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        self.export(180)
+        growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss
+
+        # ru_maxrss is in kB on Linux, every accumulated figure would add ~100 kB
+        assert_equals(growth < 8 * 1024, True)
+
+
+class CacheTopologyTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache_dir = os.path.join(self.directory, 'cache')
+        self.filename = os.path.join(self.directory, 'graph.yml')
+        shutil.copy('tests/items/ref_graph_test.yml', self.filename)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_cache(self):
+        expected = Topology.parse_graph_file(self.filename)
+        topology = Topology(cache_dir=self.cache_dir)
+
+        assert_equals(expected, topology.load_graph_data(self.filename))
+        assert_equals(1, len(os.listdir(self.cache_dir)))
+
+        # warm load doesn't parse file
+        parse = Topology.parse_graph_content
+        try:
+            Topology.parse_graph_content = staticmethod(lambda content: self.fail('File was parsed'))
+            assert_equals(expected, topology.load_graph_data(self.filename))
+        finally:
+            Topology.parse_graph_content = staticmethod(parse)
+
+    def test_cache_invalidation(self):
+        topology = Topology(cache_dir=self.cache_dir)
+        topology.load_graph_from_json(self.filename)
+
+        shutil.copy('tests/items/graph_test.yml', self.filename)
+        topology.load_graph_from_json(self.filename)
+
+        assert_equals(sorted(['router1', 'broker1', 'broker2']), sorted(topology.graph.nodes()))
+        assert_equals(1, len(os.listdir(self.cache_dir)))
+
+    def test_damaged_cache(self):
+        topology = Topology(cache_dir=self.cache_dir)
+        topology.load_graph_from_json(self.filename)
+
+        for name in os.listdir(self.cache_dir):
+            with open(os.path.join(self.cache_dir, name), 'w') as stream:
+                stream.write('damaged')
+
+        assert_equals(Topology.parse_graph_file(self.filename), topology.load_graph_data(self.filename))
+
+
+class StreamTopologyTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def assert_same_graph(self, expected, graph):
+        assert_equals(expected.is_directed(), graph.is_directed())
+        assert_equals(expected.graph, graph.graph)
+        assert_equals(dict(expected.nodes(data=True)), dict(graph.nodes(data=True)))
+        assert_equals(sorted(sorted(edge[:2]) + [edge[2]] for edge in expected.edges(data=True)),
+                      sorted(sorted(edge[:2]) + [edge[2]] for edge in graph.edges(data=True)))
+
+    def test_stream_graph_file(self):
+        for filename in ['tests/items/ref_graph_test.yml', 'tests/items/graph_test.yml', 'configs/ref_graph_file.yml']:
+            topology = Topology()
+            topology.load_graph_from_json(filename)
+
+            self.assert_same_graph(topology.graph, Topology.stream_graph_file(filename))
+
+    def test_stream_links_before_nodes(self):
+        filename = os.path.join(self.directory, 'graph.yml')
+        with open(filename, 'w') as stream:
+            stream.write("links:\n- {source: router1, target: broker1, value: 5}\n"
+                         "nodes:\n- {id: router1, type: router, def_list: no}\n- {id: broker1, type: broker}\n"
+                         "directed: true\n")
+        graph = Topology.stream_graph_file(filename)
+
+        assert_equals(True, graph.is_directed())
+        assert_equals({'type': 'router', 'def_list': False}, graph.node['router1'])
+        assert_equals({'value': 5}, graph['router1']['broker1'])
+        assert_equals(False, graph.has_edge('broker1', 'router1'))
+
+    def test_stream_sorted_multigraph(self):
+        graph = nx.MultiGraph()
+        graph.add_node('router1', type='router')
+        graph.add_node('broker1', type='broker')
+        graph.add_edge('router1', 'broker1', key=0, value=5)
+        graph.add_edge('router1', 'broker1', key=1, value=7)
+        filename = os.path.join(self.directory, 'graph.yml')
+        # yaml.dump sorts keys, multigraph follows links
+        with open(filename, 'w') as stream:
+            yaml.dump(json_graph.node_link_data(graph), stream, default_flow_style=False)
+        streamed = Topology.stream_graph_file(filename)
+
+        assert_equals(True, streamed.is_multigraph())
+        assert_equals(False, streamed.is_directed())
+        assert_equals({0: {'value': 5}, 1: {'value': 7}}, dict(streamed['router1']['broker1']))
+
+    @raises(SystemExit)
+    def test_stream_empty_graph(self):
+        Topology().load_graph_from_json('tests/items/empty_graph_test.yml', streaming=True)
+
+    @raises(SystemExit)
+    def test_stream_non_exists_graph(self):
+        Topology().load_graph_from_json('tests/items/no_graph_test.yml', streaming=True)